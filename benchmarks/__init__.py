@@ -0,0 +1,12 @@
+import os
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the code under benchmark and test lives in src/utils and final, neither of which is an installed
+# package; tests/conftest.py imports this module for the same path setup
+for directory in ('src', 'final'):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.append(path)
@@ -0,0 +1,42 @@
+import argparse
+import json
+import sys
+
+from benchmarks.cases import CASES
+from benchmarks.runner import (
+    DEFAULT_DATA_DIRECTORY, DEFAULT_SIZES, DEFAULT_THRESHOLD,
+    check_targets, compare, prepare_inputs, run_benchmarks
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Point cloud pipeline benchmarks')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='*', type=int, default=DEFAULT_SIZES, help='synthetic cloud sizes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIRECTORY, help='where generated inputs are kept')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against the results stored in this JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown against the baseline, 0.1 means 10%%')
+    args = parser.parse_args()
+
+    inputs = prepare_inputs(args.sizes, args.data_dir)
+    results = run_benchmarks(args.cases, inputs, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    failures = check_targets(results)
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            failures += compare(results, json.load(file), args.threshold)
+
+    for failure in failures:
+        print('FAIL', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
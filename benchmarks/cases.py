@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+
+import benchmarks  # noqa: F401, puts src and final on the path
+
+
+_context = None
+
+
+def _gl_context():
+    # an offscreen EGL context is enough for buffer uploads and needs no display; None when the
+    # machine has no EGL driver with desktop GL 4.1
+    global _context
+    if _context is None:
+        # PyOpenGL picks its platform on the first import of OpenGL
+        os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+        try:
+            from utils.offscreen import OffscreenContext
+            _context = OffscreenContext('egl', 64, 64)
+        except Exception:
+            return None
+    return _context
+
+
+# cases timing work per scene object report objects per second, one object stands for a thousand points
+OBJECT_CASES = ('transforms', 'transforms_batch')
+
+
+def object_count(inputs: dict) -> int:
+    return max(1, inputs['count'] // 1000)
+
+
+def read_obj_case(inputs: dict):
+    from utils.files import read_obj
+
+    return lambda: read_obj(inputs['obj'])
+
+
+def calculate_distances_case(inputs: dict):
+    from utils.distance import calculate_distances
+
+    points = np.load(inputs['points'])
+    return lambda: calculate_distances(points)
+
+
+def scale_distances_case(inputs: dict):
+    from utils.distance import scale_distances
+
+    distances = np.random.default_rng(0).random(inputs['count']) + 1e-3
+    return lambda: scale_distances(distances, 0.0005, 5.0)
+
+
+def scale_distances_log_case(inputs: dict):
+    from utils.distance import scale_distances_log
+
+    distances = np.random.default_rng(0).random(inputs['count']) + 1e-3
+    return lambda: scale_distances_log(distances, 0.0005, 5.0)
+
+
+def create_vao_case(inputs: dict):
+    if _gl_context() is None:
+        return None
+    from OpenGL.GL import glFinish
+    from utils.vao import create_vao
+
+    points = np.load(inputs['points'])
+
+    def run():
+        create_vao(points)
+        glFinish()
+    return run
+
+
+def create_vao_sized_case(inputs: dict):
+    if _gl_context() is None:
+        return None
+    from OpenGL.GL import glFinish
+    from utils.vao import create_vao_sized
+
+    points = np.load(inputs['points'])
+    sizes = np.random.default_rng(0).random(len(points)).astype(np.float32)
+
+    def run():
+        create_vao_sized(points, sizes)
+        glFinish()
+    return run
+
+
+def transforms_case(inputs: dict):
+    from transforms import Transforms
+
+    # one scene object per thousand points, each composing a rotation, translation and scale
+    count = object_count(inputs)
+    angles = np.random.default_rng(0).random((count, 3)) * 2 * np.pi
+
+    def run():
+        for x, y, z in angles:
+            Transforms.rotate(x, y, z) @ Transforms.translate(x, y, z) @ Transforms.scale(x, y, z)
+    return run
+
+
+def transforms_batch_case(inputs: dict):
+    from transforms import Transforms
+
+    # the same objects and matrices as transforms_case, built and composed as float32 batches
+    count = object_count(inputs)
+    angles = np.random.default_rng(0).random((count, 3)) * 2 * np.pi
+    rotations, translations, scales, out = (np.empty((count, 4, 4), dtype=np.float32) for _ in range(4))
+
+    def run():
+        Transforms.compose(
+            Transforms.rotate_batch(angles, out=rotations),
+            Transforms.translate_batch(angles, out=translations),
+            Transforms.scale_batch(angles, out=scales),
+            out=out
+        )
+    return run
+
+
+# every case returns the callable to time, or None when it cannot run on this machine
+CASES = {
+    'read_obj': read_obj_case,
+    'calculate_distances': calculate_distances_case,
+    'scale_distances': scale_distances_case,
+    'scale_distances_log': scale_distances_log_case,
+    'create_vao': create_vao_case,
+    'create_vao_sized': create_vao_sized_case,
+    'transforms': transforms_case,
+    'transforms_batch': transforms_batch_case,
+}
@@ -0,0 +1,186 @@
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import multiprocessing
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import ROOT
+from benchmarks.cases import CASES, OBJECT_CASES, object_count
+
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+DEFAULT_DATA_DIRECTORY = os.path.join(tempfile.gettempdir(), 'point-clouds-benchmarks')
+DEFAULT_THRESHOLD = 0.1  # a case regresses when it gets more than 10% slower than the baseline
+
+_TARGET_MIN_FILE_BYTES = 1024 ** 2  # smaller files are dominated by fixed costs
+
+
+def synthetic_cloud(count: int, seed: int = 0) -> np.ndarray:
+    # points scattered around a unit sphere, close to what a scanned surface looks like
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(count, 3))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    points *= 1.0 + 0.01 * rng.normal(size=(count, 1))
+    return points.astype(np.float32)
+
+
+def prepare_inputs(sizes: list, data_directory: str = DEFAULT_DATA_DIRECTORY) -> list:
+    from utils.files import read_obj
+
+    # inputs are written once and reused by later runs
+    os.makedirs(data_directory, exist_ok=True)
+    inputs = []
+
+    for path in sorted(glob.glob(os.path.join(ROOT, 'assets', '*.obj'))):
+        name = os.path.basename(path)
+        points_path = os.path.join(data_directory, name + '.npy')
+        if not os.path.exists(points_path):
+            np.save(points_path, read_obj(path))
+        inputs.append({'name': name, 'obj': path, 'points': points_path})
+
+    for size in sizes:
+        name = f'synthetic-{size}'
+        obj_path = os.path.join(data_directory, name + '.obj')
+        points_path = os.path.join(data_directory, name + '.npy')
+        if not os.path.exists(obj_path) or not os.path.exists(points_path):
+            points = synthetic_cloud(size)
+            np.savetxt(obj_path, points, fmt='v %.6f %.6f %.6f')
+            np.save(points_path, points)
+        inputs.append({'name': name, 'obj': obj_path, 'points': points_path})
+
+    for item in inputs:
+        item['count'] = len(np.load(item['points'], mmap_mode='r'))
+    return inputs
+
+
+def _rss_mb() -> float:
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return None
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if platform.system() == 'Darwin' else peak / 1024
+
+
+def run_case(case: str, inputs: dict, repeat: int) -> dict:
+    # runs in a fresh process, so the peak RSS belongs to this case alone
+    run = CASES[case](inputs)
+    if run is None:
+        return {'skipped': True}
+
+    rss_before = _rss_mb()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    result = {
+        'wall_s': min(times),
+        'median_s': statistics.median(times),
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_before_mb': rss_before,
+    }
+    if case in OBJECT_CASES:
+        result['objects'] = object_count(inputs)
+        result['objects_per_s'] = result['objects'] / min(times)
+    else:
+        result['points_per_s'] = inputs['count'] / min(times)
+    if case == 'read_obj':
+        result['file_mb'] = os.path.getsize(inputs['obj']) / 1024 ** 2
+        result['mb_per_s'] = result['file_mb'] / min(times)
+    return result
+
+
+def run_benchmarks(cases: list, inputs: list, repeat: int = 3) -> dict:
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    for case in cases:
+        for item in inputs:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_case, case, item, repeat).result()
+            result.update(case=case, input=item['name'], points=item['count'])
+            results.append(result)
+            print(format_result(result), flush=True)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def format_result(result: dict) -> str:
+    name = f'{result["case"]:<22}{result["input"]:<22}'
+    if result.get('skipped'):
+        return name + 'skipped'
+
+    line = f'{name}{result["wall_s"] * 1000:>12.3f} ms'
+    if 'objects_per_s' in result:
+        line += f'{result["objects_per_s"]:>16.0f} obj/s'
+    else:
+        line += f'{result["points_per_s"]:>16.0f} pts/s'
+    if result['peak_rss_mb'] is not None:
+        line += f'{result["peak_rss_mb"]:>10.1f} MB peak'
+    if 'mb_per_s' in result:
+        line += f'{result["mb_per_s"]:>10.1f} MB/s'
+    return line
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    # returns a message for every case that got slower than the baseline by more than threshold
+    reference = {
+        (result['case'], result['input']): result
+        for result in baseline['results'] if not result.get('skipped')
+    }
+
+    regressions = []
+    for result in current['results']:
+        before = reference.get((result['case'], result['input']))
+        if before is None or result.get('skipped'):
+            continue
+        change = result['wall_s'] / before['wall_s'] - 1.0
+        if change > threshold:
+            regressions.append(
+                f'{result["case"]} on {result["input"]}: {before["wall_s"] * 1000:.3f} ms -> '
+                f'{result["wall_s"] * 1000:.3f} ms ({change:+.1%}, threshold {threshold:.0%})'
+            )
+    return regressions
+
+
+def check_targets(current: dict) -> list:
+    from utils.files import READ_OBJ_TARGET_MB_PER_S
+
+    failures = []
+    for result in current['results']:
+        if result['case'] != 'read_obj' or result.get('skipped'):
+            continue
+        if result['file_mb'] * 1024 ** 2 < _TARGET_MIN_FILE_BYTES:
+            continue
+        if result['mb_per_s'] < READ_OBJ_TARGET_MB_PER_S:
+            failures.append(
+                f'read_obj on {result["input"]}: {result["mb_per_s"]:.1f} MB/s is below '
+                f'the {READ_OBJ_TARGET_MB_PER_S:.0f} MB/s target'
+            )
+    return failures
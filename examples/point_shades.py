@@ -93,8 +93,8 @@ def main():
         # Swap front and back buffers
         glfw.swap_buffers(window)
 
-        # Poll for and process events
-        glfw.poll_events()
+        # Wait for and process events, nothing changes between them
+        glfw.wait_events()
 
     glfw.terminate()
 
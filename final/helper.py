@@ -2,15 +2,26 @@ from OpenGL.GL import *
 from OpenGL.GL.shaders import compileProgram, compileShader
 import glfw
 import numpy as np
+import os
 import random
+import sys
+
+# the shared loaders and GL helpers live in src/utils
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils.loop import FrameScheduler
+from utils.program import ShaderProgram
 
 from object_primitive import *
+from render_queue import *
 from transforms import *
 from scene_object import *
 
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 800
 WINDOW_NAME = 'window name'
+MAX_FPS = 60
+ARROW_KEYS = (glfw.KEY_UP, glfw.KEY_DOWN, glfw.KEY_LEFT, glfw.KEY_RIGHT)
 
 
 def load_shader_from_file(path):
@@ -30,14 +41,35 @@ def main():
 
     glfw.make_context_current(window)
 
-    shader1 = compileProgram(
+    # frames are drawn on input only, held arrow keys keep asking for the next one
+    scheduler = FrameScheduler(MAX_FPS)
+
+    def key_callback(window, key, scancode, action, mods):
+        if key in ARROW_KEYS and action == glfw.PRESS:
+            scheduler.invalidate()
+
+    glfw.set_key_callback(window, key_callback)
+    glfw.set_window_refresh_callback(window, lambda window: scheduler.invalidate())
+    glfw.set_framebuffer_size_callback(window, lambda window, width, height: scheduler.invalidate())
+
+    shader1 = ShaderProgram(compileProgram(
         compileShader(load_shader_from_file('shaders/default1.vert'), GL_VERTEX_SHADER),
         compileShader(load_shader_from_file('shaders/default1.frag'), GL_FRAGMENT_SHADER)
-    )
-    shader2 = compileProgram(
+    ))
+    shader2 = ShaderProgram(compileProgram(
         compileShader(load_shader_from_file('shaders/default2.vert'), GL_VERTEX_SHADER),
         compileShader(load_shader_from_file('shaders/default2.frag'), GL_FRAGMENT_SHADER)
-    )
+    ))
+
+    # the same fragment shaders on one world matrix per instance, for objects sharing a primitive
+    shader1_instanced = ShaderProgram(compileProgram(
+        compileShader(load_shader_from_file('shaders/default_instanced.vert'), GL_VERTEX_SHADER),
+        compileShader(load_shader_from_file('shaders/default1.frag'), GL_FRAGMENT_SHADER)
+    ))
+    shader2_instanced = ShaderProgram(compileProgram(
+        compileShader(load_shader_from_file('shaders/default_instanced.vert'), GL_VERTEX_SHADER),
+        compileShader(load_shader_from_file('shaders/default2.frag'), GL_FRAGMENT_SHADER)
+    ))
 
     vertices1 = ObjectPrimitive.read_obj_file('assets/dense-figure.obj')
     vertices2 = ObjectPrimitive.read_obj_file('assets/go-gopher.obj')
@@ -50,19 +82,26 @@ def main():
     rotate_x = 0.0
     rotate_y = 0.0
 
-    s_obj1 = SceneObject('s_obj1', obj1, Transforms.identity())
-
-    s_obj2 = SceneObject('s_obj2', obj2, Transforms.identity())
-    s_obj2.transform(Transforms.rotate(np.radians(90), np.radians(0), np.radians(0)))
-    s_obj2.transform(Transforms.translate(0.0, -0.4, 0.4))
+    # the starting transforms of all three objects, built in one batch: a rotation followed by a translation
+    starts = Transforms.compose(
+        Transforms.rotate_batch(np.radians([[0, 0, 0], [90, 0, 0], [0, 0, 0]])),
+        Transforms.translate_batch([[0.0, 0.0, 0.0], [0.0, -0.4, 0.4], [0.0, -0.8, 0.8]])
+    )
 
-    s_obj3 = SceneObject('s_obj3', obj3, Transforms.identity())
-    s_obj3.transform(Transforms.translate(0.0, -0.8, 0.8))
+    s_obj1 = SceneObject('s_obj1', obj1, starts[0])
+    s_obj2 = SceneObject('s_obj2', obj2, starts[1])
+    s_obj3 = SceneObject('s_obj3', obj3, starts[2])
 
     s_obj1.add_child(s_obj2)
     s_obj2.add_child(s_obj3)
 
+    queue = RenderQueue({shader1: shader1_instanced, shader2: shader2_instanced})
+
     while not glfw.window_should_close(window):
+        scheduler.wait()
+        if not scheduler.begin_frame():
+            continue
+
         glClearColor(0.2, 0.3, 0.3, 1.0)
         glClear(GL_COLOR_BUFFER_BIT)
 
@@ -77,17 +116,18 @@ def main():
 
         view_transform = Transforms.rotate(np.radians(rotate_x), np.radians(rotate_y), np.radians(0))
 
-        parent_obj = s_obj1
-        parent_obj.transform(view_transform)
+        # only the root changes, its children pick the view up from the graph on the next draw
+        s_obj1.local = view_transform
 
-        s_obj1.draw(shader1, 5)
-        s_obj2.draw(shader2, 3)
-        s_obj3.draw(shader1, 3)
-
-        parent_obj.transform(np.linalg.inv(view_transform))
+        s_obj1.draw(shader1, 5, queue)
+        s_obj2.draw(shader2, 3, queue)
+        s_obj3.draw(shader1, 3, queue)
+        queue.flush()
 
         glfw.swap_buffers(window)
-        glfw.poll_events()
+
+        if any(glfw.get_key(window, key) == glfw.PRESS for key in ARROW_KEYS):
+            scheduler.invalidate()
 
 
     glfw.terminate()
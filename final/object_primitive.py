@@ -1,36 +1,86 @@
 from OpenGL.GL import *
+import ctypes
 import glfw
 import numpy as np
 
+from utils.buffers import BufferRegistry
+from utils.files import read_obj
+
+
+# first of the four locations the per-instance mat4 of shaders/default_instanced.vert takes
+INSTANCE_TRANSFORM_LOCATION = 1
+
 
 class ObjectPrimitive:
+    # glPointSize is global state, only changed when a draw asks for another size
+    _point_size = None
+    buffers = BufferRegistry()
+
     @staticmethod
     def read_obj_file(path):
-        with open(path, 'r') as f:
-            return np.array(list(map(lambda x: np.array(list(map(float, x[1:]))), filter(lambda x: x[0] == 'v', map(lambda x: x.split(), f.readlines())))))
-        return None
+        return read_obj(path)
 
     def _create_vao(self, vertices):
         self.vao = glGenVertexArrays(1)
+        self.buffer = self.buffers.acquire(np.ascontiguousarray(vertices, dtype=np.float32))
+        self._generation = None
+
+    def bind(self):
+        # primitives with the same vertices share one vbo, the vao is pointed at it again
+        # whenever the registry had to upload it anew
+        generation = self.buffers.use(self.buffer)
         glBindVertexArray(self.vao)
+        if generation != self._generation:
+            glBindBuffer(GL_ARRAY_BUFFER, self.buffer.vbo)
+            glEnableVertexAttribArray(0)
+            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+            self._generation = generation
 
-        vbo = glGenBuffers(1)
-        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    def __init__(self, vertices, buffers=None):
+        if buffers is not None:
+            self.buffers = buffers
+        self.vertices = vertices
+        self._create_vao(self.vertices)
 
-        vertices = np.array(vertices, dtype=np.float32)
-        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+    def delete(self):
+        glDeleteVertexArrays(1, [self.vao])
+        self.buffers.release(self.buffer)
 
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+    @staticmethod
+    def set_point_size(points_size):
+        # returns whether glPointSize had to be called
+        if ObjectPrimitive._point_size == points_size:
+            return False
+        glPointSize(points_size)
+        ObjectPrimitive._point_size = points_size
+        return True
 
-    def __init__(self, vertices):
-        self.vertices = vertices
-        self._create_vao(self.vertices)
+    def draw_arrays(self):
+        glDrawArrays(GL_POINTS, 0, len(self.vertices))
+
+    def bind_instances(self, buffer, first):
+        # points the instance attributes of the bound vao at the matrices from index first on
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        for column in range(4):
+            location = INSTANCE_TRANSFORM_LOCATION + column
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, 64, ctypes.c_void_p(first * 64 + column * 16))
+            glVertexAttribDivisor(location, 1)
+
+    def draw_instanced(self, instance_count):
+        # the instance attributes are switched off again afterwards, the vao is shared with the
+        # plain draws, which would otherwise read a stale matrix per vertex at locations 1 to 4
+        glDrawArraysInstanced(GL_POINTS, 0, len(self.vertices), instance_count)
+        for column in range(4):
+            location = INSTANCE_TRANSFORM_LOCATION + column
+            glVertexAttribDivisor(location, 0)
+            glDisableVertexAttribArray(location)
 
     def draw(self, transform, shader, points_size):
-        glUseProgram(shader)
-        glPointSize(points_size)
-        transformLoc = glGetUniformLocation(shader, 'transform')
-        glUniformMatrix4fv(transformLoc, 1, GL_FALSE, transform)
-        glBindVertexArray(self.vao)
-        glDrawArrays(GL_POINTS, 0, len(self.vertices)//3)
+        # shader is a utils.program.ShaderProgram, which skips the program switch and the
+        # transform upload when they are already in place
+        shader.use()
+        ObjectPrimitive.set_point_size(points_size)
+        shader.set('transform', transform)
+        self.bind()
+        self.draw_arrays()
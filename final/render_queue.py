@@ -0,0 +1,104 @@
+from OpenGL.GL import *
+from itertools import groupby
+
+import numpy as np
+
+from utils.program import ShaderProgram
+
+from object_primitive import ObjectPrimitive
+
+
+class RenderQueue:
+    def __init__(self, instanced=None, min_instances=2):
+        # instanced maps a ShaderProgram to its counterpart built on shaders/default_instanced.vert,
+        # runs of at least min_instances objects sharing a primitive, program and point size are
+        # drawn with it in a single instanced draw call
+        self.submissions = []
+        self.instanced = {}
+        for shader, instanced_shader in (instanced or {}).items():
+            self.add_instanced(shader, instanced_shader)
+        self.min_instances = min_instances
+
+        self._instance_buffer = None
+        self._instance_capacity = 0
+        self.stats = {
+            'draws': 0, 'instanced_draws': 0, 'instances': 0,
+            'program_switches': 0, 'vao_binds': 0, 'point_size_changes': 0,
+        }
+
+    def add_instanced(self, shader, instanced_shader):
+        self.instanced[shader.program] = instanced_shader
+
+    def submit(self, primitive, transform, shader, points_size):
+        # the transform is copied, SceneObject.world is a view into the scene graph that the next
+        # update overwrites, possibly before flush()
+        self.submissions.append((primitive, np.array(transform, dtype=np.float32), shader, points_size))
+
+    def _upload_instances(self, transforms):
+        # all instance matrices of the frame go up in one glBufferSubData, the buffer only
+        # grows, doubling, when a frame has more instances than ever before
+        if self._instance_buffer is None:
+            self._instance_buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self._instance_buffer)
+        if len(transforms) > self._instance_capacity:
+            self._instance_capacity = max(len(transforms), 2 * self._instance_capacity)
+            glBufferData(GL_ARRAY_BUFFER, self._instance_capacity * 64, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, transforms.nbytes, transforms)
+
+    def flush(self):
+        # draws everything submitted since the last flush, sorted so that objects sharing a
+        # program, then a vao, then a point size follow each other and state only changes
+        # between runs
+        key = lambda submission: (submission[2].program, submission[0].vao, submission[3])
+        self.submissions.sort(key=key)
+        runs = [list(run) for _, run in groupby(self.submissions, key=key)]
+        stats = dict.fromkeys(self.stats, 0)
+
+        instanced = [len(run) >= self.min_instances and run[0][2].program in self.instanced for run in runs]
+        if any(instanced):
+            transforms = np.stack([
+                transform for run, is_instanced in zip(runs, instanced) if is_instanced for _, transform, _, _ in run
+            ])
+            self._upload_instances(np.ascontiguousarray(transforms, dtype=np.float32))
+
+        program = vao = None
+        first = 0
+        for run, is_instanced in zip(runs, instanced):
+            primitive, _, shader, points_size = run[0]
+            if is_instanced:
+                shader = self.instanced[shader.program]
+
+            if shader.program != program:
+                if ShaderProgram._current != shader.program:
+                    stats['program_switches'] += 1
+                shader.use()
+                program = shader.program
+            if primitive.vao != vao:
+                primitive.bind()
+                vao = primitive.vao
+                stats['vao_binds'] += 1
+            if ObjectPrimitive.set_point_size(points_size):
+                stats['point_size_changes'] += 1
+
+            if is_instanced:
+                primitive.bind_instances(self._instance_buffer, first)
+                primitive.draw_instanced(len(run))
+                first += len(run)
+                stats['instanced_draws'] += 1
+                stats['instances'] += len(run)
+                stats['draws'] += 1
+                continue
+
+            for _, transform, _, _ in run:
+                shader.set('transform', transform)
+                primitive.draw_arrays()
+                stats['draws'] += 1
+
+        self.submissions.clear()
+        self.stats = stats
+
+    def delete(self):
+        if self._instance_buffer is not None:
+            glDeleteBuffers(1, [self._instance_buffer])
+            self._instance_buffer = None
+            self._instance_capacity = 0
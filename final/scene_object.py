@@ -1,36 +1,174 @@
 import numpy as np
-import copy
+
+from transforms import Transforms
+
+
+class SceneGraph:
+    # local and world matrices of every node live in two (N, 4, 4) float32 arrays; matrices
+    # act on row vectors (point @ matrix), so world = local @ parent world
+    def __init__(self, capacity=64):
+        self.local = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.world = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.parent = np.full(capacity, -1, dtype=np.int64)
+        self.level = np.zeros(capacity, dtype=np.int64)
+        self.dirty = np.zeros(capacity, dtype=bool)
+
+        self.count = 0
+        self.changed = False  # any node dirty, so update() on a clean graph costs nothing
+        self._levels = None  # node indices grouped by level, rebuilt after the hierarchy changes
+
+    def _grow(self):
+        capacity = 2 * len(self.parent)
+        for name in ('local', 'world', 'parent', 'level', 'dirty'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            if name == 'parent':
+                new[:] = -1
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, local):
+        if self.count == len(self.parent):
+            self._grow()
+        index = self.count
+        self.count += 1
+
+        self.local[index] = local
+        self.dirty[index] = True
+        self.changed = True
+        self._levels = None
+        return index
+
+    def set_parent(self, index, parent, levels):
+        # levels maps every node of the moved subtree to its new level
+        self.parent[index] = parent
+        for node, level in levels.items():
+            self.level[node] = level
+        self.dirty[index] = True
+        self.changed = True
+        self._levels = None
+
+    def set_local(self, index, local):
+        self.local[index] = local
+        self.dirty[index] = True
+        self.changed = True
+
+    def is_ancestor(self, ancestor, index):
+        # walks the parent links up from index, O(depth)
+        while index >= 0:
+            if index == ancestor:
+                return True
+            index = self.parent[index]
+        return False
+
+    def chain_world(self, index):
+        # the current world matrix of one node from the local matrices along its parent chain, for
+        # callers that must not wait for or trigger the batched update of the whole graph
+        world = self.local[index]
+        parent = self.parent[index]
+        while parent >= 0:
+            world = world @ self.local[parent]
+            parent = self.parent[parent]
+        return world
+
+    def update(self):
+        # recomputes the world matrices of the dirty nodes and everything below them, one batched
+        # matmul per level, parents always before their children
+        if not self.changed:
+            return
+
+        if self._levels is None:
+            order = np.argsort(self.level[:self.count], kind='stable')
+            boundaries = np.flatnonzero(np.diff(self.level[order])) + 1
+            self._levels = np.split(order, boundaries)
+
+        for nodes in self._levels:
+            parents = self.parent[nodes]
+            has_parent = parents >= 0
+            # a node is stale when it changed itself or its parent was recomputed above
+            dirty = self.dirty[nodes]
+            dirty[has_parent] |= self.dirty[parents[has_parent]]
+            self.dirty[nodes] = dirty
+
+            roots = nodes[dirty & ~has_parent]
+            self.world[roots] = self.local[roots]
+            children = nodes[dirty & has_parent]
+            self.world[children] = np.matmul(self.local[children], self.world[self.parent[children]])
+
+        self.dirty[:self.count] = False
+        self.changed = False
 
 
 class SceneObject:
     names = set()
+    graph = SceneGraph()
 
-    def __init__(self, name, object_primitive, transformations):
+    def __init__(self, name, object_primitive, transformations, graph=None):
         if name in type(self).names:
             raise Exception('Existing name of SceneObject object')
 
         self.name = name
         type(self).names.add(name)
         self.object_primitive = object_primitive
-        self.transformations = transformations
 
+        if graph is not None:
+            self.graph = graph
+        self.index = self.graph.add(transformations)
+
+        self.parent = None
         self.children = []
 
     def add_child(self, child):
+        # the child keeps where it is in the world, its local transform becomes relative to this object;
+        # both worlds come from the parent chains, the world matrices are recomputed by the next update()
+        if self.graph.is_ancestor(child.index, self.index):
+            raise Exception('SceneObject cannot be a child of its own subtree')
+
+        world = self.graph.chain_world(child.index)
+        if child.parent is not None:
+            child.parent.children.remove(child)
+        child.parent = self
         self.children += [child]
 
-    def transform(self, transformation):
-        for child in self.children:
-            child.transform(transformation)
+        base_level = self.graph.level[self.index] + 1
+        levels = {}
+        stack = [(child, base_level)]
+        while stack:
+            node, level = stack.pop()
+            levels[node.index] = level
+            stack += [(grandchild, level + 1) for grandchild in node.children]
+
+        child.local = world @ np.linalg.inv(self.graph.chain_world(self.index))
+        self.graph.set_parent(child.index, self.index, levels)
+
+    @property
+    def local(self):
+        return self.graph.local[self.index]
 
-        # self.transformations = np.linalg.inv(center)@self.transformations
-        # self.transformations = transformation@self.transformations
-        # self.transformations = (transformation@center)@self.transformations
+    @local.setter
+    def local(self, value):
+        self.graph.set_local(self.index, value)
 
-        new_transformations = np.identity(4)
-        new_transformations = transformation@new_transformations
-        new_transformations = self.transformations@new_transformations
-        self.transformations = new_transformations
+    @property
+    def world(self):
+        self.graph.update()
+        return self.graph.world[self.index]
+
+    # the world matrix handed to the shader, as before the graph existed
+    transformations = world
+
+    def transform(self, transformation):
+        # applies the transformation after the current world transform of this object, the whole
+        # subtree follows through its parent links
+        if self.parent is None:
+            self.local = Transforms.compose(self.local, transformation)
+        else:
+            parent_world = self.parent.world
+            self.local = Transforms.compose(self.local, parent_world, transformation, np.linalg.inv(parent_world))
 
-    def draw(self, shader, points_size):
-        self.object_primitive.draw(self.transformations, shader, points_size)
+    def draw(self, shader, points_size, queue=None):
+        # with a render_queue.RenderQueue the draw is only submitted, it happens on queue.flush()
+        if queue is None:
+            self.object_primitive.draw(self.world, shader, points_size)
+        else:
+            queue.submit(self.object_primitive, self.world, shader, points_size)
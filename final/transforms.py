@@ -42,3 +42,115 @@ class Transforms:
             [0, 0, 1, 0],
             [0, 0, 0, 1]
         ])
+
+    # the batch versions build N matrices at once as one (N, 4, 4) float32 array, ready for
+    # glUniformMatrix4fv or an instance buffer, into out when it is given
+
+    @staticmethod
+    def _output(count, out):
+        if out is None:
+            return np.zeros((count, 4, 4), dtype=np.float32)
+        if out.shape != (count, 4, 4) or out.dtype != np.float32:
+            raise ValueError(f'out has to be a ({count}, 4, 4) float32 array')
+        out[...] = 0
+        return out
+
+    @staticmethod
+    def identity_batch(count, out=None):
+        out = Transforms._output(count, out)
+        out[:, [0, 1, 2, 3], [0, 1, 2, 3]] = 1
+        return out
+
+    @staticmethod
+    def translate_batch(vectors, out=None):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, 3)
+        out = Transforms.identity_batch(len(vectors), out)
+        out[:, 3, :3] = vectors
+        return out
+
+    @staticmethod
+    def scale_batch(vectors, out=None):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, 3)
+        out = Transforms._output(len(vectors), out)
+        out[:, [0, 1, 2], [0, 1, 2]] = vectors
+        out[:, 3, 3] = 1
+        return out
+
+    @staticmethod
+    def rotate_batch(angles, out=None):
+        # the same rotation as rotate(x, y, z), with the Rx @ Ry @ Rz product written out
+        angles = np.asarray(angles, dtype=np.float32).reshape(-1, 3)
+        out = Transforms._output(len(angles), out)
+        cx, cy, cz = np.cos(angles).T
+        sx, sy, sz = np.sin(angles).T
+
+        out[:, 0, 0] = cy * cz
+        out[:, 0, 1] = -cy * sz
+        out[:, 0, 2] = sy
+        out[:, 1, 0] = sx * sy * cz + cx * sz
+        out[:, 1, 1] = cx * cz - sx * sy * sz
+        out[:, 1, 2] = -sx * cy
+        out[:, 2, 0] = sx * sz - cx * sy * cz
+        out[:, 2, 1] = cx * sy * sz + sx * cz
+        out[:, 2, 2] = cx * cy
+        out[:, 3, 3] = 1
+        return out
+
+    @staticmethod
+    def from_quaternions(quaternions, out=None):
+        # quaternions are (x, y, z, w) rows, normalized here; the matrices are laid out like rotate(),
+        # so the quaternion of an angle around one axis gives the matrix rotate_batch builds for it
+        quaternions = np.asarray(quaternions, dtype=np.float32).reshape(-1, 4)
+        quaternions = quaternions / np.linalg.norm(quaternions, axis=1, keepdims=True)
+        out = Transforms._output(len(quaternions), out)
+        x, y, z, w = quaternions.T
+
+        out[:, 0, 0] = 1 - 2 * (y * y + z * z)
+        out[:, 0, 1] = 2 * (x * y - z * w)
+        out[:, 0, 2] = 2 * (x * z + y * w)
+        out[:, 1, 0] = 2 * (x * y + z * w)
+        out[:, 1, 1] = 1 - 2 * (x * x + z * z)
+        out[:, 1, 2] = 2 * (y * z - x * w)
+        out[:, 2, 0] = 2 * (x * z - y * w)
+        out[:, 2, 1] = 2 * (y * z + x * w)
+        out[:, 2, 2] = 1 - 2 * (x * x + y * y)
+        out[:, 3, 3] = 1
+        return out
+
+    @staticmethod
+    def compose_quaternions(first, second, out=None):
+        # the quaternions of compose(from_quaternions(first), from_quaternions(second)), which with
+        # the rotate() layout is the Hamilton product first * second
+        first = np.asarray(first, dtype=np.float32).reshape(-1, 4)
+        second = np.asarray(second, dtype=np.float32).reshape(-1, 4)
+        if len(first) != len(second) and 1 not in (len(first), len(second)):
+            raise ValueError(f'Cannot compose {len(first)} quaternions with {len(second)}, expected equal counts or one of them')
+        count = max(len(first), len(second))
+        if out is None:
+            out = np.empty((count, 4), dtype=np.float32)
+        elif out.shape != (count, 4) or out.dtype != np.float32:
+            raise ValueError(f'out has to be a ({count}, 4) float32 array')
+        x1, y1, z1, w1 = first.T
+        x2, y2, z2, w2 = second.T
+
+        out[:, 0] = w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2
+        out[:, 1] = w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2
+        out[:, 2] = w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
+        out[:, 3] = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
+        return out
+
+    @staticmethod
+    def compose(*matrices, out=None):
+        # applies the matrices left to right, like chaining transform() calls; single (4, 4)
+        # matrices broadcast against the (N, 4, 4) batches
+        if not matrices:
+            raise ValueError('compose needs at least one matrix')
+        if len(matrices) == 1:
+            if out is None:
+                return np.array(matrices[0], dtype=np.float32)
+            out[...] = matrices[0]
+            return out
+        result = np.matmul(matrices[0], matrices[1], out=out, dtype=np.float32)
+        for matrix in matrices[2:]:
+            result = np.matmul(result, matrix, out=result, dtype=np.float32)
+        return result
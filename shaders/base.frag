@@ -1,14 +1,19 @@
 #version 410 core
 
-out vec4 fragColor;
-
-uniform float transparency;
-uniform float luminance;
-uniform vec3 splatColor;
+layout (location = 0) out vec4 fragColor;
+layout (location = 1) out float revealage;
 
 void main()
 {
     vec3 finalColor = splatColor * luminance;
     float finalAlpha = transparency;
-    fragColor = vec4(finalColor, finalAlpha);
+    if (weightedBlended)
+    {
+        fragColor = vec4(finalColor * finalAlpha, finalAlpha) * oitWeight(finalAlpha);
+        revealage = finalAlpha;
+    }
+    else
+    {
+        fragColor = vec4(finalColor, finalAlpha);
+    }
 }
\ No newline at end of file
@@ -1,7 +1,7 @@
 #version 410
 layout (location = 0) in vec3 aPos;
-uniform mat4 transform;
 void main()
 {
-    gl_Position = transform * vec4(aPos.x, aPos.y, aPos.z, 1.0);
+    vec3 position = decodePosition(aPos);
+    gl_Position = transform * vec4(position, 1.0);
 }
\ No newline at end of file
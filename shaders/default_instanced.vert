@@ -0,0 +1,8 @@
+#version 410
+// one world matrix per instance, read from consecutive attribute locations 1 to 4
+layout(location = 0) in vec3 position;
+layout(location = 1) in mat4 instanceTransform;
+void main()
+{
+    gl_Position = instanceTransform * vec4(position, 1.0);
+}
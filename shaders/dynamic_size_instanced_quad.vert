@@ -0,0 +1,17 @@
+#version 410
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in float aSize;
+layout (location = 2) in vec2 aCorner;
+layout (location = 3) in vec3 aColor;
+uniform bool instanceColors;
+out vec2 Corner;
+out vec3 Color;
+void main()
+{
+    vec3 position = decodePosition(aPos);
+    float pointSize = decodeSize(aSize);
+    // aPos, aSize and aColor advance once per instance, aCorner walks the four corners of the shared quad
+    gl_Position = transform * vec4(position, 1.0) + vec4(aCorner * size * pointSize, 0.0, 0.0);
+    Corner = aCorner;
+    Color = instanceColors ? aColor : splatColor;
+}
\ No newline at end of file
@@ -0,0 +1,11 @@
+#version 410
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in float aSize;
+void main()
+{
+    vec3 position = decodePosition(aPos);
+    float pointSize = decodeSize(aSize);
+    gl_Position = transform * vec4(position, 1.0);
+    // same diameter in pixels as the disc dynamic_size_circle.geom emits around the point
+    gl_PointSize = size * pointSize * viewportHeight / gl_Position.w;
+}
\ No newline at end of file
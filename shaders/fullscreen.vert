@@ -0,0 +1,7 @@
+#version 410
+void main()
+{
+    // one triangle covering the whole viewport, built from the vertex id without any buffer
+    vec2 position = vec2((gl_VertexID << 1) & 2, gl_VertexID & 2);
+    gl_Position = vec4(position * 2.0 - 1.0, 0.0, 1.0);
+}
\ No newline at end of file
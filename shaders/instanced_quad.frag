@@ -0,0 +1,25 @@
+#version 410 core
+
+in vec2 Corner;
+in vec3 Color;
+layout (location = 0) out vec4 fragColor;
+layout (location = 1) out float revealage;
+
+void main()
+{
+    // the quad spans [-1, 1] in both directions, drop the pixels outside the inscribed circle
+    if (dot(Corner, Corner) > 1.0)
+        discard;
+
+    vec3 finalColor = Color * luminance;
+    float finalAlpha = transparency;
+    if (weightedBlended)
+    {
+        fragColor = vec4(finalColor * finalAlpha, finalAlpha) * oitWeight(finalAlpha);
+        revealage = finalAlpha;
+    }
+    else
+    {
+        fragColor = vec4(finalColor, finalAlpha);
+    }
+}
\ No newline at end of file
@@ -0,0 +1,19 @@
+#version 410 core
+
+out vec4 fragColor;
+
+uniform sampler2D accumTexture;
+uniform sampler2D revealageTexture;
+
+void main()
+{
+    ivec2 texel = ivec2(gl_FragCoord.xy);
+    float revealage = texelFetch(revealageTexture, texel, 0).r;
+    if (revealage >= 1.0)
+        discard;  // no splat covers this pixel
+
+    // premultiplied colors summed with their weights, divided by the summed weighted alpha
+    vec4 accum = texelFetch(accumTexture, texel, 0);
+    vec3 averageColor = accum.rgb / max(accum.a, 1e-5);
+    fragColor = vec4(averageColor, 1.0 - revealage);
+}
\ No newline at end of file
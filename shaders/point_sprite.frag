@@ -0,0 +1,23 @@
+#version 410 core
+
+layout (location = 0) out vec4 fragColor;
+layout (location = 1) out float revealage;
+
+void main()
+{
+    // the sprite is a square, drop the pixels outside the inscribed circle
+    if (length(gl_PointCoord - vec2(0.5)) > 0.5)
+        discard;
+
+    vec3 finalColor = splatColor * luminance;
+    float finalAlpha = transparency;
+    if (weightedBlended)
+    {
+        fragColor = vec4(finalColor * finalAlpha, finalAlpha) * oitWeight(finalAlpha);
+        revealage = finalAlpha;
+    }
+    else
+    {
+        fragColor = vec4(finalColor, finalAlpha);
+    }
+}
\ No newline at end of file
@@ -0,0 +1,9 @@
+#version 410
+layout (location = 0) in vec3 aPos;
+void main()
+{
+    vec3 position = decodePosition(aPos);
+    gl_Position = transform * vec4(position, 1.0);
+    // same diameter in pixels as the disc circle.geom emits around the point
+    gl_PointSize = size * viewportHeight / gl_Position.w;
+}
\ No newline at end of file
@@ -0,0 +1,8 @@
+// put in front of every fragment shader by compile_program, after the Frame block
+
+// weighted blended order-independent transparency (McGuire and Bavoil 2013), composited by utils/oit.py;
+// nearer and more opaque splats weigh more in the average
+float oitWeight(float alpha)
+{
+    return clamp(pow(min(1.0, alpha * 10.0) + 0.01, 3.0) * 1e8 * pow(1.0 - gl_FragCoord.z * 0.9, 3.0), 1e-2, 3e3);
+}
@@ -0,0 +1,19 @@
+// put in front of every vertex shader by compile_program, after the Frame block
+
+// set by set_quantization_uniforms when aPos holds normalized 16 bit coordinates (see utils/quantize.py)
+uniform bool quantizedPositions;
+uniform vec3 positionScale;
+uniform vec3 positionOffset;
+// with sizeLogEncoded, aSize holds the normalized logarithm of the size between sizeLogRange.x and sizeLogRange.y
+uniform bool sizeLogEncoded;
+uniform vec2 sizeLogRange;
+
+vec3 decodePosition(vec3 encoded)
+{
+    return quantizedPositions ? positionOffset + encoded * positionScale : encoded;
+}
+
+float decodeSize(float encoded)
+{
+    return sizeLogEncoded ? exp(mix(sizeLogRange.x, sizeLogRange.y, encoded)) : encoded;
+}
@@ -1,12 +1,26 @@
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
 import glfw
 import glm
 import numpy as np
+import os
 
-from utils.files import read_obj, read_shader_file
-from utils.vao import create_vao, create_vao_sized
-from utils.distance import calculate_distances, scale_distances, scale_distances_log
+from utils.cloud import load_cloud, load_colors
+from utils.files import count_vertices, iter_vertex_blocks
+from utils.loop import FrameScheduler
+from utils.culling import ChunkedCloud
+from utils.octree import Octree
+from utils.oit import WeightedBlendedOIT
+from utils.quantize import quantize_vertices
+from utils.program_cache import ProgramCache
+from utils.shaders import (
+    DEFAULT_SPLAT_SIZE, ShaderWatcher, create_frame_uniforms, create_splat_shader, set_instance_colors,
+    set_quantization_uniforms, splat_variant
+)
+from utils.timing import GpuTimer
+from utils.vao import (
+    create_vao, create_vao_instanced, create_vao_sized, create_vao_streamed, draw_instanced, multi_draw_arrays,
+    upload_blocks
+)
 
 
 ZOOM = 1.0
@@ -16,11 +30,32 @@ IS_MIDDLE_MOUSE_BUTTON_PRESSED = False
 IS_RIGHT_MOUSE_BUTTON_PRESSED = False
 ROTATION_ANGLE = [0.0, 0.0]  # in radians
 DYNAMIC_SPLAT_SIZING = False
+SPLAT_SHAPE = 'circle'  # 'circle' or 'square' splats from a geometry shader, or 'point_sprite' / 'instanced_quad' discs without one
+INSTANCE_COLORS = False  # color instanced quads with the "v x y z r g b" colors of the model, ignored with downsampling
+MODEL_PATH = os.path.join('assets', 'go-gopher.obj')
+LOADER_WORKERS = None  # processes parsing large OBJ files, None uses every core
+USE_CACHE = True  # keep parsed clouds, splat sizes and linked shader binaries in ~/.cache/point-clouds
+LIVE_SHADER_RELOAD = True  # recompile the splat shader when one of its files in shaders/ is saved
+DOWNSAMPLE_VOXEL_SIZE = None  # merge the points of every voxel of this size into one
+DOWNSAMPLE_TARGET_COUNT = None  # or pick the voxel size that leaves about this many points
+STREAMING_LOAD = False  # upload the cloud block by block while rendering, ignored with DYNAMIC_SPLAT_SIZING or downsampling
+QUANTIZE_VERTICES = False  # 16 bit positions and compact sizes, about half the memory, ignored with STREAMING_LOAD
+SIZE_ENCODING = 'half'  # 'half' floats or 'log8' 8 bit logarithms for the quantized splat sizes
+FRUSTUM_CULLING = False  # skip Morton-ordered chunks outside the view, ignored with POINT_BUDGET or instanced quads
+POINT_BUDGET = None  # draw at most this many points per frame from an octree, picking the nodes largest on screen, ignored with instanced quads
+PROGRESSIVE_REFINEMENT = True  # while the view rests, redraw with twice the point budget until the whole octree is drawn
+WEIGHTED_BLENDED_OIT = False  # blend the translucent splats independently of their order, with one extra full-screen pass
+MAX_FPS = 60  # frames are only drawn after input or data updates, and never more often than this
+SCHEDULER = FrameScheduler(MAX_FPS)
+GPU_TIMING = False  # time every pass with GL_TIME_ELAPSED queries, see TIMER.stats()
+TIMING_LOG = 'frame-timings.jsonl'  # per-frame pass timings are appended here while GPU_TIMING is on
+TIMER = GpuTimer(log_path=TIMING_LOG, enabled=GPU_TIMING)
 
 def scroll_callback(window, x_offset, y_offset):
     global ZOOM
     ZOOM += y_offset * 0.1
     ZOOM = max(0.1, ZOOM)
+    SCHEDULER.invalidate()
 
 def cursor_position_callback(window, xpos, ypos):
     global LAST_MOUSE_PAN
@@ -30,9 +65,11 @@ def cursor_position_callback(window, xpos, ypos):
     if IS_MIDDLE_MOUSE_BUTTON_PRESSED:
         PAN[0] += dx * 0.0025
         PAN[1] -= dy * 0.0025  # y is inverted
+        SCHEDULER.invalidate()
     elif IS_RIGHT_MOUSE_BUTTON_PRESSED:
         ROTATION_ANGLE[0] += dy * 0.01
         ROTATION_ANGLE[1] += dx * 0.01
+        SCHEDULER.invalidate()
     LAST_MOUSE_PAN = [xpos, ypos]
 
 def mouse_button_callback(window, button, action, mods):
@@ -49,6 +86,11 @@ def key_callback(window, key, scancode, action, mods):
 
 def window_resize_callback(window, width, height):
     glViewport(0, 0, width, height)
+    SCHEDULER.invalidate()
+
+def window_refresh_callback(window):
+    # the window was uncovered or restored and its contents are gone
+    SCHEDULER.invalidate()
 
 def main():
     global ZOOM
@@ -70,51 +112,109 @@ def main():
     glfw.set_mouse_button_callback(window, mouse_button_callback)
     glfw.set_key_callback(window, key_callback)
     glfw.set_window_size_callback(window, window_resize_callback)
+    glfw.set_window_refresh_callback(window, window_refresh_callback)
 
-    if DYNAMIC_SPLAT_SIZING:
-        vertex_shader_source = read_shader_file('shaders\dynamic_size.vert')
-        geometry_shader_source = read_shader_file('shaders\dynamic_size_circle.geom')
-    else:
-        vertex_shader_source = read_shader_file('shaders\\base.vert')
-        geometry_shader_source = read_shader_file('shaders\circle.geom')
-    fragment_shader_source = read_shader_file('shaders\\base.frag')
-
-    shader = compileProgram(
-        compileShader(vertex_shader_source, GL_VERTEX_SHADER),
-        compileShader(geometry_shader_source, GL_GEOMETRY_SHADER),
-        compileShader(fragment_shader_source, GL_FRAGMENT_SHADER)
-    )
-
-    vertices = read_obj('assets\go-gopher.obj') # You might have to tweak the slash as I am on Windows rn
-
-    if DYNAMIC_SPLAT_SIZING:
-        distances = calculate_distances(vertices)
-        sizes = scale_distances_log(distances, 0.0005, 5.0)
-        vao = create_vao_sized(vertices, sizes)
-    else:
-        vao = create_vao(vertices)
-
-    glUseProgram(shader)
+    variant = splat_variant(DYNAMIC_SPLAT_SIZING, SPLAT_SHAPE)
+    program_cache = ProgramCache() if USE_CACHE else None
+    shader = create_splat_shader(variant, program_cache)
+    watcher = ShaderWatcher(variant) if LIVE_SHADER_RELOAD else None
 
-    size_location = glGetUniformLocation(shader, "size")
-    glUniform1f(size_location, 0.01)  # Adjust size value as needed
-
-    splat_color = np.array([0.41, 0.87, 0.98], dtype=np.float32)  # Example splat color
-    transparency = 0.5  # Example transparency value
-    luminance = 1.0 # Example luminance value
+    uploads = None
+    octree = None
+    chunks = None
+    encoding = None
+    colors = None
+    vertex_colors = False
+    instanced = SPLAT_SHAPE == 'instanced_quad'
+    downsampled = DOWNSAMPLE_VOXEL_SIZE is not None or DOWNSAMPLE_TARGET_COUNT is not None
+    if STREAMING_LOAD and not DYNAMIC_SPLAT_SIZING and not downsampled and not instanced:
+        capacity = count_vertices(MODEL_PATH)
+        vao, vbo = create_vao_streamed(capacity)
+        uploads = upload_blocks(vbo, iter_vertex_blocks(MODEL_PATH), capacity)
+        point_count = 0
+    else:
+        vertices, sizes = load_cloud(
+            MODEL_PATH, DYNAMIC_SPLAT_SIZING, USE_CACHE, LOADER_WORKERS,
+            DOWNSAMPLE_VOXEL_SIZE, DOWNSAMPLE_TARGET_COUNT
+        )
+        if POINT_BUDGET is not None and not instanced:
+            # the octree order keeps the points of every node next to each other in the buffer
+            octree = Octree(vertices)
+            vertices = vertices[octree.order]
+            if sizes is not None:
+                sizes = sizes[octree.order]
+        elif FRUSTUM_CULLING and not instanced:
+            chunks = ChunkedCloud(vertices)
+            vertices = vertices[chunks.order]
+            if sizes is not None:
+                sizes = sizes[chunks.order]
+            # splats reach this far past their point in clip space
+            cull_margin = DEFAULT_SPLAT_SIZE * (float(sizes.max()) if sizes is not None and len(sizes) else 1.0)
+        if INSTANCE_COLORS and instanced and not downsampled:
+            # instanced quads keep the file order, so the colors line up with the positions
+            colors = load_colors(MODEL_PATH)
+            vertex_colors = colors is not None
+        if QUANTIZE_VERTICES:
+            # positions, sizes and colors end up in one record array that create_vao uploads as it is
+            vertices, encoding = quantize_vertices(vertices, sizes, colors, size_encoding=SIZE_ENCODING)
+            sizes = colors = None
+        if instanced:
+            vao = create_vao_instanced(vertices, sizes, colors)
+        elif sizes is not None:
+            vao = create_vao_sized(vertices, sizes)
+        else:
+            vao = create_vao(vertices)
+        point_count = len(vertices)
 
-    glUniform3fv(glGetUniformLocation(shader, "splatColor"), 1, splat_color)
-    glUniform1f(glGetUniformLocation(shader, "transparency"), transparency)
-    glUniform1f(glGetUniformLocation(shader, "luminance"), luminance)
+    frame = create_frame_uniforms(glfw.get_framebuffer_size(window)[1])
+    oit = WeightedBlendedOIT(*glfw.get_framebuffer_size(window), program_cache) if WEIGHTED_BLENDED_OIT else None
+    frame.update(weightedBlended=oit is not None)
+    shader.use()
+    set_quantization_uniforms(shader, encoding)
+    set_instance_colors(shader, vertex_colors)
 
+    glEnable(GL_PROGRAM_POINT_SIZE)
     glEnable(GL_BLEND)
     glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
     # Loop until the user closes the window
     while not glfw.window_should_close(window):
+        # Block until input or a data update needs a new frame
+        SCHEDULER.wait()
+
+        # Upload the next block of a streamed cloud, the ones before it are drawn already
+        if uploads is not None:
+            uploaded = next(uploads, None)
+            if uploaded is None:
+                uploads = None
+            else:
+                point_count = uploaded
+                SCHEDULER.invalidate()
+
+        # Swap in the edited shader, a broken edit keeps the previous one running
+        if watcher is not None and watcher.changed():
+            try:
+                reloaded = create_splat_shader(variant, program_cache)
+            except RuntimeError as error:
+                print(f'Shader reload failed: {error}')
+            else:
+                shader.delete()
+                shader = reloaded
+                shader.use()
+                set_quantization_uniforms(shader, encoding)
+                set_instance_colors(shader, vertex_colors)
+                SCHEDULER.invalidate()
+
+        if not SCHEDULER.begin_frame():
+            continue
+
         # Render
-        glClearColor(0.3, 0.3, 0.3, 1.0)
-        glClear(GL_COLOR_BUFFER_BIT)
+        with TIMER.measure('clear'):
+            glClearColor(0.3, 0.3, 0.3, 1.0)
+            glClear(GL_COLOR_BUFFER_BIT)
+            if oit is not None:
+                oit.resize(*glfw.get_framebuffer_size(window))
+                oit.begin()
 
         transform = glm.mat4(1)  # Identity matrix
         transform = glm.translate(transform, glm.vec3(PAN[0], PAN[1], 0.0))
@@ -122,17 +222,41 @@ def main():
         transform = glm.rotate(transform, ROTATION_ANGLE[0], glm.vec3(1.0, 0.0, 0.0))
         transform = glm.rotate(transform, ROTATION_ANGLE[1], glm.vec3(0.0, 1.0, 0.0))
 
-        glUniformMatrix4fv(glGetUniformLocation(shader, "transform"), 1, GL_FALSE, glm.value_ptr(transform))
+        # one upload of the changed Frame members, nothing when the view did not move
+        frame.update(transform=np.array(transform), viewportHeight=glfw.get_framebuffer_size(window)[1])
 
-        glBindVertexArray(vao)
-        glDrawArrays(GL_POINTS, 0, len(vertices)//3)
+        # picking the octree nodes or visible chunks is CPU work only
+        with TIMER.measure('select', gpu=False):
+            if octree is not None:
+                # rows of the numpy array are glm's columns, the layout the shader receives
+                budget = POINT_BUDGET * 2 ** SCHEDULER.refinement if PROGRESSIVE_REFINEMENT else POINT_BUDGET
+                firsts, counts = octree.select(np.array(transform), glfw.get_framebuffer_size(window)[1], budget)
+                if PROGRESSIVE_REFINEMENT and counts.sum() >= budget:
+                    SCHEDULER.refine()
+            elif chunks is not None:
+                firsts, counts = chunks.select(np.array(transform), cull_margin)
+                glfw.set_window_title(window, f"Point Clouds - {chunks.stats['drawn']} drawn, {chunks.stats['culled']} culled")
+
+        # vertex, geometry and fragment work plus blending of the splats
+        with TIMER.measure('splats'):
+            glBindVertexArray(vao)
+            if octree is not None or chunks is not None:
+                multi_draw_arrays(firsts, counts)
+            elif instanced:
+                draw_instanced(point_count)
+            else:
+                glDrawArrays(GL_POINTS, 0, point_count)
+
+        if oit is not None:
+            with TIMER.measure('composite'):
+                oit.composite()
+            shader.use()
 
         # Swap front and back buffers
         glfw.swap_buffers(window)
+        TIMER.end_frame()
 
-        # Poll for and process events
-        glfw.poll_events()
-
+    TIMER.close()
     glfw.terminate()
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+import argparse
+import ctypes
+import json
+import os
+import time
+
+import numpy as np
+
+
+VARIANTS = [
+    'circle', 'square', 'point_sprite', 'instanced_quad',
+    'dynamic_circle', 'dynamic_square', 'dynamic_point_sprite', 'dynamic_instanced_quad',
+]
+
+# rasterizers running on CPU threads, their GL_TIME_ELAPSED results leave out the rasterization
+SOFTWARE_RENDERERS = ('llvmpipe', 'softpipe', 'swrast')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Render the point cloud offscreen and report frame times')
+    parser.add_argument('--backend', choices=['egl', 'osmesa'], default='egl')
+    parser.add_argument('--software', action='store_true', help='force the llvmpipe software rasterizer')
+    parser.add_argument('--model', default=os.path.join('assets', 'go-gopher.obj'))
+    parser.add_argument('--variants', nargs='+', default=VARIANTS)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10, help='frames rendered before measuring')
+    parser.add_argument('--width', type=int, default=1200)
+    parser.add_argument('--height', type=int, default=1200)
+    parser.add_argument('--oit', action='store_true', help='draw with weighted blended order-independent transparency')
+    parser.add_argument('--instance-colors', action='store_true',
+                        help='color the instanced quads per point, from the "v x y z r g b" colors of the model or, '
+                             'without them, from the position of every point in the bounding box')
+    parser.add_argument('--output', help='write the per-frame timings to this JSON file')
+    return parser.parse_args()
+
+
+def summarize(values: list) -> dict:
+    values = np.asarray(values)
+    return {
+        'mean': float(values.mean()),
+        'median': float(np.median(values)),
+        'p95': float(np.percentile(values, 95)),
+        'max': float(values.max()),
+    }
+
+
+def is_software_renderer(renderer: str) -> bool:
+    return any(name in renderer.lower() for name in SOFTWARE_RENDERERS)
+
+def render_frames(shader, vao: int, point_count: int, frames: int, instanced: bool = False,
+                  oit=None, framebuffer: int = 0, gpu_timer: bool = True) -> list:
+    # frame_ms is the wall time until glFinish returns, the throughput metric on every renderer;
+    # gpu_ms is only measured with gpu_timer, on renderers whose timer queries cover the draw
+    from OpenGL.GL import (
+        GL_COLOR_BUFFER_BIT, GL_POINTS, GL_QUERY_RESULT, GL_TIME_ELAPSED, glBeginQuery, glBindVertexArray,
+        glClear, glClearColor, glDeleteQueries, glDrawArrays, glEndQuery, glFinish, glGenQueries,
+        glGetQueryObjectui64v
+    )
+    from utils.vao import draw_instanced
+
+    query = int(glGenQueries(1)[0]) if gpu_timer else None
+    # PyOpenGL has no array type for 64 bit query results, a ctypes integer is passed by reference
+    elapsed = ctypes.c_uint64()
+
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        if gpu_timer:
+            glBeginQuery(GL_TIME_ELAPSED, query)
+
+        glClearColor(0.3, 0.3, 0.3, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT)
+        if oit is not None:
+            oit.begin()
+        shader.use()
+        glBindVertexArray(vao)
+        if instanced:
+            draw_instanced(point_count)
+        else:
+            glDrawArrays(GL_POINTS, 0, point_count)
+        if oit is not None:
+            oit.composite(framebuffer)
+        submitted = time.perf_counter()
+
+        # the draw finishes inside the query, so the queued work is part of gpu_ms
+        glFinish()
+        if gpu_timer:
+            glEndQuery(GL_TIME_ELAPSED)
+        finished = time.perf_counter()
+
+        timing = {'cpu_ms': (submitted - start) * 1000, 'frame_ms': (finished - start) * 1000}
+        if gpu_timer:
+            glGetQueryObjectui64v(query, GL_QUERY_RESULT, ctypes.byref(elapsed))
+            timing['gpu_ms'] = elapsed.value / 1e6
+        timings.append(timing)
+
+    if gpu_timer:
+        glDeleteQueries(1, [query])
+    return timings
+
+
+def main():
+    args = parse_args()
+
+    # both have to be set before OpenGL is imported for the first time
+    os.environ.setdefault('PYOPENGL_PLATFORM', args.backend)
+    if args.software:
+        os.environ['LIBGL_ALWAYS_SOFTWARE'] = '1'
+        os.environ['GALLIUM_DRIVER'] = 'llvmpipe'
+
+    from OpenGL.GL import (
+        GL_BLEND, GL_ONE_MINUS_SRC_ALPHA, GL_PROGRAM_POINT_SIZE, GL_RENDERER, GL_SRC_ALPHA, glBlendFunc, glEnable,
+        glGetString
+    )
+    from utils.cloud import load_cloud, load_colors
+    from utils.offscreen import OffscreenContext
+    from utils.oit import WeightedBlendedOIT
+    from utils.shaders import create_frame_uniforms, create_splat_shader, is_dynamic, is_instanced, set_instance_colors
+    from utils.vao import create_vao, create_vao_instanced, create_vao_sized
+
+    context = OffscreenContext(args.backend, args.width, args.height)
+    renderer = glGetString(GL_RENDERER).decode()
+    print(f'{args.backend} context on {renderer}, {args.width}x{args.height}')
+    gpu_timer = not is_software_renderer(renderer)
+    if not gpu_timer:
+        print('software renderer, its timer queries miss the rasterization: gpu_ms is not measured, compare frame_ms')
+
+    # every variant draws the same cloud, the dynamic ones with the same per-point sizes
+    vertices, sizes = load_cloud(args.model, any(is_dynamic(variant) for variant in args.variants))
+    colors = None
+    if args.instance_colors:
+        colors = load_colors(args.model)
+        if colors is None:
+            extent = np.ptp(vertices, axis=0)
+            colors = (vertices - vertices.min(axis=0)) / np.where(extent > 0, extent, 1)
+    # keyed by (dynamic, instanced)
+    vaos = {(False, False): create_vao(vertices), (False, True): create_vao_instanced(vertices, colors=colors)}
+    if sizes is not None:
+        vaos[True, False] = create_vao_sized(vertices, sizes)
+        vaos[True, True] = create_vao_instanced(vertices, sizes, colors)
+
+    # identity transform and the default splat look, shared by every variant
+    frame = create_frame_uniforms(args.height)
+    oit = WeightedBlendedOIT(args.width, args.height) if args.oit else None
+    frame.update(weightedBlended=args.oit)
+
+    glEnable(GL_PROGRAM_POINT_SIZE)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    results = {
+        'backend': args.backend, 'renderer': renderer, 'points': len(vertices), 'oit': args.oit,
+        'instance_colors': args.instance_colors, 'gpu_timer': gpu_timer, 'variants': {}
+    }
+    for variant in args.variants:
+        shader = create_splat_shader(variant)
+        set_instance_colors(shader, colors is not None)
+
+        context.bind()
+        instanced = is_instanced(variant)
+        vao = vaos[is_dynamic(variant), instanced]
+        render_frames(shader, vao, len(vertices), args.warmup, instanced, oit, context.framebuffer, gpu_timer)
+        timings = render_frames(shader, vao, len(vertices), args.frames, instanced, oit, context.framebuffer, gpu_timer)
+
+        summary = {key: summarize([timing[key] for timing in timings]) for key in timings[0]}
+        results['variants'][variant] = {'summary': summary, 'frames': timings}
+        print(f'{variant:<24}' + ''.join(
+            f'{key} {summary[key]["mean"]:8.3f} ms (p95 {summary[key]["p95"]:8.3f})  ' for key in summary
+        ))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    context.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,10 @@ from OpenGL.GL.shaders import compileProgram, compileShader
 import glfw
 import numpy as np
 
+from utils.cache import PointCloudCache, read_obj_cached
+from utils.program import ShaderProgram
+from utils.vao import create_vao
+
 
 vertex_shader = """
 #version 410
@@ -23,32 +27,6 @@ void main()
 }
 """
 
-def create_vao(points):
-    points = np.array(points, dtype=np.float32)
-
-    vao = glGenVertexArrays(1)
-    glBindVertexArray(vao)
-
-    vbo = glGenBuffers(1)
-    glBindBuffer(GL_ARRAY_BUFFER, vbo)
-    glBufferData(GL_ARRAY_BUFFER, points.nbytes, points, GL_STATIC_DRAW)
-
-    glEnableVertexAttribArray(0)
-    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
-
-    return vao
-
-def read_obj(filename):
-    vertices = []
-
-    with open(filename, 'r') as file:
-        for line in file:
-            parts = line.split()
-            if parts[0] == 'v':  # the line describes a vertex
-                vertices.append(list(map(float, parts[1:])))
-
-    return vertices
-
 def main():
 
     # Initialize the library
@@ -63,12 +41,13 @@ def main():
 
     glfw.make_context_current(window)
 
-    shader = compileProgram(
+    shader = ShaderProgram(compileProgram(
         compileShader(vertex_shader, GL_VERTEX_SHADER),
         compileShader(fragment_shader, GL_FRAGMENT_SHADER)
-    )
+    ))
 
-    vertices = read_obj('assets\go-gopher.obj') # You might have to tweak the slash as I am on Windows rn
+    # parsed once, later runs memory-map the cached positions instead of parsing the OBJ again
+    vertices = read_obj_cached('assets\go-gopher.obj', PointCloudCache()) # You might have to tweak the slash as I am on Windows rn
 
     vao = create_vao(vertices)
 
@@ -85,7 +64,7 @@ def main():
         glClearColor(0.2, 0.3, 0.3, 1.0)
         glClear(GL_COLOR_BUFFER_BIT)
 
-        glUseProgram(shader)
+        shader.use()
 
         # Handle keyboard input
         translation_speed = 0.0005
@@ -135,18 +114,20 @@ def main():
         transform = np.matmul(rotation_matrix_x, transform)
 
         transform = np.matmul(rotation_matrix_y, transform)
-        
-        transformLoc = glGetUniformLocation(shader, "transform")
-        glUniformMatrix4fv(transformLoc, 1, GL_FALSE, transform)
+
+        shader.set('transform', transform)
 
         glBindVertexArray(vao)
-        glDrawArrays(GL_POINTS, 0, len(vertices)//3)
+        glDrawArrays(GL_POINTS, 0, len(vertices))
 
         # Swap front and back buffers
         glfw.swap_buffers(window)
 
-        # Poll for and process events
-        glfw.poll_events()
+        # Block until the next event unless a held arrow key keeps moving the cloud
+        if any(glfw.get_key(window, key) == glfw.PRESS for key in (glfw.KEY_UP, glfw.KEY_DOWN, glfw.KEY_LEFT, glfw.KEY_RIGHT)):
+            glfw.poll_events()
+        else:
+            glfw.wait_events()
 
     glfw.terminate()
 
@@ -0,0 +1,123 @@
+from OpenGL.GL import *
+import hashlib
+import logging
+import weakref
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class SharedBuffer:
+    def __init__(self, key: str, array: np.ndarray):
+        self.key = key
+        self.array = array  # kept on the CPU until the first use() uploads it
+        self.nbytes = array.nbytes
+        self.vbo = None
+        self.refs = 0
+        self.generation = 0  # bumped on upload, VAOs pointing at an older one need rebinding
+        self.last_used = 0
+
+
+class BufferRegistry:
+    def __init__(self, max_bytes: int = None, usage=GL_STATIC_DRAW):
+        # without max_bytes a buffer is freed as soon as its last user releases it; with a budget
+        # released buffers stay resident until something else needs the memory
+        self.max_bytes = max_bytes
+        self.usage = usage
+
+        self._buffers = {}  # content key -> SharedBuffer
+        self._ids = {}  # id(array) -> (weak reference, content key), skips hashing known arrays
+        self._clock = 0
+        self.resident_bytes = 0
+        self.uploads = 0
+        self.over_budget = False
+
+    def key(self, array: np.ndarray) -> str:
+        # arrays are assumed not to change after they were acquired, like every vbo in this repo
+        known = self._ids.get(id(array))
+        if known is not None and known[0]() is array:
+            return known[1]
+
+        digest = hashlib.blake2b(f'{array.dtype.str}{array.shape}'.encode(), digest_size=16)
+        digest.update(np.ascontiguousarray(array).data)
+        key = digest.hexdigest()
+
+        try:
+            reference = weakref.ref(array, lambda _, index=id(array): self._ids.pop(index, None))
+        except TypeError:
+            return key  # views of foreign memory cannot be weakly referenced, they are hashed each time
+        self._ids[id(array)] = (reference, key)
+        return key
+
+    def acquire(self, array: np.ndarray) -> SharedBuffer:
+        key = self.key(array)
+        if key not in self._buffers:
+            self._buffers[key] = SharedBuffer(key, np.ascontiguousarray(array))
+        buffer = self._buffers[key]
+        buffer.refs += 1
+        return buffer
+
+    def release(self, buffer: SharedBuffer):
+        buffer.refs -= 1
+        if buffer.refs > 0:
+            return
+        if self.max_bytes is None or buffer.vbo is None:
+            self._remove(buffer)
+        else:
+            self.evict()
+
+    def use(self, buffer: SharedBuffer) -> int:
+        # uploads the buffer if it is not resident and marks it as used, returns its generation
+        self._clock += 1
+        buffer.last_used = self._clock
+        if buffer.vbo is None:
+            self._upload(buffer)
+        return buffer.generation
+
+    def _upload(self, buffer: SharedBuffer):
+        self.evict(incoming=buffer.nbytes, keep=buffer)
+        buffer.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, buffer.vbo)
+        glBufferData(GL_ARRAY_BUFFER, buffer.nbytes, buffer.array, self.usage)
+        buffer.generation += 1
+        self.resident_bytes += buffer.nbytes
+        self.uploads += 1
+
+    def _free(self, buffer: SharedBuffer):
+        if buffer.vbo is not None:
+            glDeleteBuffers(1, [buffer.vbo])
+            buffer.vbo = None
+            self.resident_bytes -= buffer.nbytes
+
+    def _remove(self, buffer: SharedBuffer):
+        self._free(buffer)
+        self._buffers.pop(buffer.key, None)
+
+    def evict(self, incoming: int = 0, keep: SharedBuffer = None):
+        # drops least recently used released buffers until incoming more bytes fit in the budget;
+        # buffers still in use are never freed, when they alone exceed it the budget is overrun
+        if self.max_bytes is None:
+            return
+
+        released = [
+            buffer for buffer in self._buffers.values()
+            if buffer.vbo is not None and buffer.refs == 0 and buffer is not keep
+        ]
+        for buffer in sorted(released, key=lambda buffer: buffer.last_used):
+            if self.resident_bytes + incoming <= self.max_bytes:
+                break
+            self._remove(buffer)
+
+        over_budget = self.resident_bytes + incoming > self.max_bytes
+        if over_budget and not self.over_budget:
+            logger.warning(
+                'Buffers in use take %d bytes, over the budget of %d bytes', self.resident_bytes + incoming, self.max_bytes
+            )
+        self.over_budget = over_budget
+
+    def clear(self):
+        for buffer in list(self._buffers.values()):
+            self._remove(buffer)
+        self._ids.clear()
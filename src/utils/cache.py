@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from utils.files import read_obj
+
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'point-clouds')
+DEFAULT_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
+_HASH_CHUNK_SIZE = 16 * 1024 ** 2
+_INDEX_FILE = 'index.json'
+
+
+class PointCloudCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._keys = {}  # (path, size, mtime) -> key, so a file is hashed once per run
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = self._read_index()
+
+    def _read_index(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, _INDEX_FILE), 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        path = os.path.join(self.directory, _INDEX_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self._index, file)
+        os.replace(path + '.tmp', path)
+
+    def key(self, filename: str) -> str:
+        # the key covers the source path, size, modification time and content
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        identity = (path, stat.st_size, stat.st_mtime_ns)
+        if identity in self._keys:
+            return self._keys[identity]
+
+        digest = hashlib.blake2b(repr(identity).encode(), digest_size=16)
+        with open(path, 'rb') as file:
+            while chunk := file.read(_HASH_CHUNK_SIZE):
+                digest.update(chunk)
+
+        self._keys[identity] = digest.hexdigest()
+        return self._keys[identity]
+
+    def load(self, filename: str, name: str):
+        key = self.key(filename)
+        entry = self._index.get(key)
+        if entry is None or name not in entry['arrays']:
+            return None
+
+        try:
+            # .npy data starts 64-byte aligned, so the memory map can go straight to glBufferData
+            array = np.load(os.path.join(self.directory, key, name + '.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            self.invalidate(filename)
+            return None
+
+        entry['last_used'] = time.time()
+        self._write_index()
+        return array
+
+    def store(self, filename: str, name: str, array: np.ndarray) -> np.ndarray:
+        key = self.key(filename)
+        os.makedirs(os.path.join(self.directory, key), exist_ok=True)
+
+        path = os.path.join(self.directory, key, name + '.npy')
+        with open(path + '.tmp', 'wb') as file:
+            np.save(file, np.ascontiguousarray(array))
+        os.replace(path + '.tmp', path)
+
+        entry = self._index.setdefault(key, {'source': os.path.abspath(filename), 'arrays': {}})
+        entry['arrays'][name] = os.path.getsize(path)
+        entry['last_used'] = time.time()
+
+        self.evict(keep=key)
+        self._write_index()
+        return np.load(path, mmap_mode='r')
+
+    def fetch(self, filename: str, name: str, compute) -> np.ndarray:
+        array = self.load(filename, name)
+        if array is None:
+            array = self.store(filename, name, compute())
+        return array
+
+    def size(self) -> int:
+        return sum(sum(entry['arrays'].values()) for entry in self._index.values())
+
+    def evict(self, keep: str = None):
+        # drop the least recently used entries until the cache fits in max_bytes
+        total = self.size()
+        for key in sorted(self._index, key=lambda key: self._index[key]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= sum(self._index[key]['arrays'].values())
+            self._remove(key)
+
+    def invalidate(self, filename: str = None):
+        # forget every cached version of the file, or the whole cache without a filename
+        if filename is None:
+            keys = list(self._index)
+        else:
+            source = os.path.abspath(filename)
+            keys = [key for key, entry in self._index.items() if entry['source'] == source]
+
+        for key in keys:
+            self._remove(key)
+        self._keys = {identity: key for identity, key in self._keys.items() if key not in keys}
+        self._write_index()
+
+    def _remove(self, key: str):
+        del self._index[key]
+        shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+
+
+def read_obj_cached(filename: str, cache: PointCloudCache, workers: int = 1) -> np.ndarray:
+    return cache.fetch(filename, 'positions', lambda: read_obj(filename, workers))
@@ -0,0 +1,39 @@
+import numpy as np
+
+from utils.cache import PointCloudCache
+from utils.distance import calculate_distances, scale_distances_log
+from utils.downsample import voxel_downsample
+from utils.files import read_obj, read_obj_attributes
+
+
+SPLAT_SIZE_RANGE = (0.0005, 5.0)
+
+
+def load_cloud(filename: str, dynamic_sizing: bool, use_cache: bool = True, workers: int = 1,
+               voxel_size: float = None, target_count: int = None) -> tuple:
+    # returns the (N, 3) float32 positions and, with dynamic sizing, the per-point splat sizes;
+    # voxel_size or target_count downsample the cloud before the sizes are derived from it
+    cache = PointCloudCache() if use_cache else None
+
+    def fetch(name, compute):
+        return cache.fetch(filename, name, compute) if cache is not None else compute()
+
+    vertices = fetch('positions', lambda: read_obj(filename, workers))
+
+    suffix = ''
+    if voxel_size is not None or target_count is not None:
+        suffix = f'_voxel_{voxel_size}' if voxel_size is not None else f'_target_{target_count}'
+        vertices = fetch('positions' + suffix, lambda: voxel_downsample(vertices, voxel_size, target_count)[0])
+
+    if not dynamic_sizing:
+        return vertices, None
+
+    def compute_sizes():
+        distances = calculate_distances(vertices)
+        return scale_distances_log(distances, *SPLAT_SIZE_RANGE).astype(np.float32)
+
+    return vertices, fetch('sizes_log_{}_{}'.format(*SPLAT_SIZE_RANGE) + suffix, compute_sizes)
+
+def load_colors(filename: str) -> np.ndarray:
+    # the per-point colors of the "v x y z r g b" OBJ extension, None when the file has none
+    return read_obj_attributes(filename).get('colors')
@@ -0,0 +1,59 @@
+import numpy as np
+
+from utils.octree import merge_ranges
+
+
+MORTON_BITS = 10  # per axis, 30 bit codes
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    # inserts two zero bits after each of the lower 10 bits
+    values = values.astype(np.uint64) & np.uint64(0x3ff)
+    values = (values | (values << np.uint64(16))) & np.uint64(0x030000ff)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x0300f00f)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x030c30c3)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x09249249)
+    return values
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    # interleaves the bits of the coordinates quantized to a 1024^3 grid over the bounding box
+    origin = points.min(axis=0)
+    extent = float((points.max(axis=0) - origin).max()) or 1.0
+    cells = np.minimum((points - origin) / extent * (1 << MORTON_BITS), (1 << MORTON_BITS) - 1).astype(np.uint64)
+    return _spread_bits(cells[:, 0]) << np.uint64(2) | _spread_bits(cells[:, 1]) << np.uint64(1) | _spread_bits(cells[:, 2])
+
+
+class ChunkedCloud:
+    def __init__(self, points: np.ndarray, chunk_size: int = 4096):
+        # chunks of consecutive points in Morton order are compact in space, so their boxes stay tight
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        self.order = np.argsort(morton_codes(points), kind='stable')
+        ordered = points[self.order]
+
+        self.starts = np.arange(0, len(points), chunk_size)
+        self.counts = np.diff(np.append(self.starts, len(points)))
+        self.mins = np.minimum.reduceat(ordered, self.starts, axis=0) if len(points) else np.zeros((0, 3), np.float32)
+        self.maxs = np.maximum.reduceat(ordered, self.starts, axis=0) if len(points) else np.zeros((0, 3), np.float32)
+
+        # the eight corners of every box as homogeneous points, (chunks, 8, 4)
+        corners = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=bool)
+        self.corners = np.ones((len(self.starts), 8, 4), dtype=np.float32)
+        self.corners[:, :, :3] = np.where(corners, self.maxs[:, None, :], self.mins[:, None, :])
+
+        self.stats = {'chunks': len(self.starts), 'drawn_chunks': 0, 'drawn': 0, 'culled': 0}
+
+    def visible(self, transform: np.ndarray, margin: float = 0.0) -> np.ndarray:
+        # transform is laid out as glUniformMatrix4fv receives it, so clip = point @ transform;
+        # a box is culled when all its corners are outside the same clip plane, margin widens
+        # the frustum by the splat radius in clip units
+        clip = self.corners @ np.asarray(transform, dtype=np.float32).reshape(4, 4)
+        xyz, w = clip[:, :, :3], clip[:, :, 3:]
+        outside = (xyz - margin > w) | (xyz + margin < -w)
+        return ~np.any(np.all(outside, axis=1), axis=1)
+
+    def select(self, transform: np.ndarray, margin: float = 0.0) -> tuple:
+        # (firsts, counts) of the visible chunks for multi_draw_arrays, neighbours merged
+        visible = self.visible(transform, margin)
+        drawn = int(self.counts[visible].sum())
+        self.stats.update(drawn_chunks=int(visible.sum()), drawn=drawn, culled=int(self.counts.sum()) - drawn)
+        return merge_ranges(self.starts[visible], self.counts[visible])
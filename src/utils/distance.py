@@ -1,16 +1,29 @@
 import numpy as np
-from scipy.spatial import distance
+from scipy.spatial import cKDTree
 
 
-def calculate_distances(vertices: list) -> list:
+REDUCTIONS = {
+    'min': lambda distances: distances[:, 0],
+    'mean': lambda distances: distances.mean(axis=1),
+    'median': lambda distances: np.median(distances, axis=1),
+}
+
+
+def calculate_distances(vertices: np.ndarray, k: int = 1, reduction: str = 'min', chunk_size: int = 65536) -> np.ndarray:
+    if reduction not in REDUCTIONS:
+        raise ValueError(f'Unknown reduction "{reduction}", expected one of {list(REDUCTIONS)}')
+
     # reshape the array into a 2D array where each row represents a point
-    points = np.array(vertices).reshape(-1, 3)
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
 
-    # calculate the pairwise Euclidean distance between all points
-    distance_matrix = distance.cdist(points, points, 'euclidean')
+    # a k-d tree answers each query in O(log N) instead of building the N x N distance matrix
+    tree = cKDTree(points)
 
-    # sort each row and take the second smallest element (i.e. the smallest non-zero distance)
-    distances = np.sort(distance_matrix, axis=1)[:, 1]
+    distances = np.empty(len(points), dtype=np.float64)
+    for start in range(0, len(points), chunk_size):
+        # ask for one extra neighbour, the closest one is the point itself
+        neighbours, _ = tree.query(points[start:start + chunk_size], k=k + 1, workers=-1)
+        distances[start:start + chunk_size] = REDUCTIONS[reduction](neighbours[:, 1:])
 
     return distances
 
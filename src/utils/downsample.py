@@ -0,0 +1,118 @@
+import numpy as np
+
+
+DOWNSAMPLE_MODES = ('centroid', 'representative')
+
+# splitmix64 finalizer rounds, neighbouring voxels have to land in unrelated table slots
+_HASH_ROUNDS = [(np.uint64(30), np.uint64(0xBF58476D1CE4E5B9)), (np.uint64(27), np.uint64(0x94D049BB133111EB))]
+
+
+def voxel_keys(points: np.ndarray, voxel_size: float) -> np.ndarray:
+    # quantize the points to voxel coordinates and pack them into one int64 per point
+    cells = np.floor((points - points.min(axis=0)) / voxel_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    if np.prod(dims.astype(np.float64)) >= 2 ** 63:
+        raise ValueError(f'Voxel size {voxel_size} is too small for the extent of the cloud')
+
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+
+def count_voxels(points: np.ndarray, voxel_size: float) -> int:
+    return len(np.unique(voxel_keys(points, voxel_size)))
+
+
+def _estimate_voxels(offsets: np.ndarray, voxel_size: float, table: np.ndarray) -> float:
+    # linear counting: the voxel coordinates are hashed into a table of flags and the number of
+    # distinct voxels follows from the share of flags left unset, one O(N) pass instead of a sort;
+    # offsets are the points relative to their minimum, so truncating them floors them
+    bits = np.uint64(64 - int(np.log2(len(table))))
+    cells = (offsets / np.float32(voxel_size)).astype(np.uint64)
+    # 21 bits per axis are enough for the at most 2 ** 20 voxels per axis the search tries
+    hashes = cells[:, 0] << np.uint64(42) | cells[:, 1] << np.uint64(21) | cells[:, 2]
+    for shift, multiplier in _HASH_ROUNDS:
+        hashes = (hashes ^ (hashes >> shift)) * multiplier
+    table[:] = False
+    table[hashes >> bits] = True
+
+    empty = len(table) - np.count_nonzero(table)
+    if empty == 0:
+        return float(len(offsets))
+    return min(float(len(offsets)), -len(table) * np.log(empty / len(table)))
+
+
+def voxel_size_for_count(points: np.ndarray, target_count: int, tolerance: float = 0.02, iterations: int = 24) -> float:
+    # the number of occupied voxels falls as they grow, roughly as a power of the size, so the size
+    # is searched on a log scale with secant steps on that power, falling back to bisection when
+    # a step leaves the bracket; counts are estimated, the final pass over all points is exact
+    offsets = points - points.min(axis=0)
+    extent = float(offsets.max()) or 1.0
+    low, high = np.log(extent / 2 ** 20), np.log(extent)
+    # sized so the estimate stays well within the tolerance up to one voxel per point
+    table = np.zeros(1 << int(np.clip(np.ceil(np.log2(max(len(points), 1))) + 3, 16, 26)), dtype=bool)
+
+    # surfaces dominate scanned clouds, where the count grows with the inverse square of the size
+    slope = -2.0
+    size = np.log(extent) - np.log(target_count) / 2
+    previous = None
+    best_size, best_error = extent, np.inf
+    for _ in range(iterations):
+        count = max(_estimate_voxels(offsets, float(np.exp(size)), table), 1.0)
+        error = abs(count - target_count) / target_count
+        if error < best_error:
+            best_size, best_error = float(np.exp(size)), error
+        if error <= tolerance:
+            break
+
+        if count > target_count:
+            low = size
+        else:
+            high = size
+        if previous is not None and previous[1] != count:
+            slope = float(np.clip((np.log(count) - np.log(previous[1])) / (size - previous[0]), -3.0, -0.25))
+        previous = (size, count)
+
+        step = size + (np.log(target_count) - np.log(count)) / slope
+        size = step if low < step < high else (low + high) / 2
+
+    return best_size
+
+
+def voxel_downsample(points: np.ndarray, voxel_size: float = None, target_count: int = None,
+                     attributes: dict = None, mode: str = 'centroid') -> tuple:
+    # reduces every occupied voxel to its centroid or to the point closest to it; attributes are averaged
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError(f'Unknown downsampling mode "{mode}", expected one of {DOWNSAMPLE_MODES}')
+    if voxel_size is None and target_count is None:
+        raise ValueError('Either voxel_size or target_count is required')
+
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    attributes = attributes or {}
+    if target_count is not None and target_count >= len(points):
+        return points, attributes
+    if voxel_size is None:
+        voxel_size = voxel_size_for_count(points, target_count)
+
+    # group the points by voxel, sort based so the whole pass stays O(N log N)
+    _, inverse, counts = np.unique(voxel_keys(points, voxel_size), return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    def average(values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values)
+        columns = values.reshape(len(values), -1).astype(np.float64)
+        sums = np.stack([np.bincount(inverse, weights=column, minlength=len(counts)) for column in columns.T], axis=1)
+        means = sums / counts[:, None]
+        if values.dtype.kind in 'iu':
+            means = np.rint(means)
+        return means.reshape((len(counts),) + values.shape[1:]).astype(values.dtype)
+
+    centroids = average(points)
+    if mode == 'centroid':
+        downsampled = centroids
+    else:
+        # per voxel, the first point after sorting by voxel and then by distance to the centroid
+        distances = np.linalg.norm(points - centroids[inverse], axis=1)
+        order = np.lexsort((distances, inverse))
+        firsts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        downsampled = points[order[firsts]]
+
+    return downsampled, {name: average(values) for name, values in attributes.items()}
@@ -1,14 +1,424 @@
-def read_obj(filename: str) -> list:
-    vertices = []
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import io
+import itertools
+import os
 
+import numpy as np
+
+
+# single-core read_obj throughput, bound by numpy's float parser: over 40 runs a 1M point file
+# holding nothing but vertices parsed at 45 MB/s median and 34 MB/s at worst, go-gopher.obj at
+# 150 MB/s median; the target leaves a margin for noisy machines below the slowest run, and
+# `python -m benchmarks` and tests/test_files.py fail below it
+READ_OBJ_TARGET_MB_PER_S = 30.0
+
+PARALLEL_MIN_BYTES = 64 * 1024 ** 2  # smaller files are parsed serially by read_obj
+PARALLEL_RANGE_BYTES = 64 * 1024 ** 2  # upper bound on the bytes a worker holds at once
+
+STREAM_BLOCK_SIZE = 1 << 20  # vertices per block yielded by iter_vertex_blocks
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+# PLY vertex properties making up each attribute returned by read_ply
+PLY_ATTRIBUTES = {
+    'positions': ('x', 'y', 'z'),
+    'normals': ('nx', 'ny', 'nz'),
+    'colors': ('red', 'green', 'blue'),
+    'intensity': ('intensity',),
+}
+
+_READ_CHUNK_SIZE = 16 * 1024 ** 2
+_NEWLINE = ord('\n')
+_WHITESPACE = np.array([ord(' '), ord('\t')], dtype=np.uint8)
+
+
+def _record_lines(buffer: np.ndarray, prefix: bytes) -> tuple:
+    # line starts, the first non-blank byte of every line and which lines hold prefix records
+    starts = np.concatenate(([0], np.flatnonzero(buffer == _NEWLINE) + 1))
+    starts = starts[starts < len(buffer)]
+
+    # records may be indented, step the heads of indented lines forward one byte at a time
+    heads = starts.copy()
+    indented = np.arange(len(heads))
+    while len(indented):
+        indented = indented[np.isin(buffer[heads[indented]], _WHITESPACE)]
+        heads[indented] += 1
+        indented = indented[heads[indented] < len(buffer)]
+
+    # keep only the lines that start with the prefix followed by whitespace
+    selected = np.zeros(len(starts), dtype=bool)
+    candidates = np.flatnonzero(heads + len(prefix) < len(buffer))
+    matches = np.isin(buffer[heads[candidates] + len(prefix)], _WHITESPACE)
+    for i, char in enumerate(prefix):
+        matches &= buffer[heads[candidates] + i] == char
+    selected[candidates] = matches
+
+    return starts, heads, selected
+
+
+def _select_records(buffer: np.ndarray, prefix: bytes) -> tuple:
+    starts, heads, selected = _record_lines(buffer, prefix)
+    count = int(selected.sum())
+
+    records = buffer.copy()
+    for i in range(len(prefix)):
+        records[heads[selected] + i] = ord(' ')
+
+    if 2 * count >= len(starts):
+        # mostly records, turning the other lines into comments is cheaper than cutting them out
+        skipped = starts[~selected]
+        records[skipped[buffer[skipped] != _NEWLINE]] = ord('#')
+        return records.tobytes(), count
+
+    lengths = np.diff(np.append(starts, len(buffer)))
+    return records[np.repeat(selected, lengths)].tobytes(), count
+
+
+def parse_records(data: bytes, prefix: bytes) -> np.ndarray:
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    records, count = _select_records(buffer, prefix)
+    if count == 0:
+        return np.empty((0, 3), dtype=np.float32)
+
+    # the selected lines hold nothing but numbers now, numpy's C reader parses them in one go
+    try:
+        values = np.loadtxt(io.BytesIO(records), dtype=np.float32, comments='#', ndmin=2)
+    except ValueError as error:
+        raise ValueError(f'Inconsistent "{prefix.decode()}" records: {error}') from error
+
+    if len(values) != count:
+        raise ValueError(f'Inconsistent "{prefix.decode()}" records: expected {count} rows, got {len(values)}')
+    return values
+
+
+def read_obj_attributes(filename: str) -> dict:
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    vertices = parse_records(data, b'v')
+    normals = parse_records(data, b'vn')
+
+    attributes = {'positions': np.ascontiguousarray(vertices[:, :3])}
+    if len(normals) == len(vertices):
+        attributes['normals'] = np.ascontiguousarray(normals[:, :3])
+    if vertices.shape[1] >= 6:  # the "v x y z r g b" vertex color extension
+        attributes['colors'] = np.ascontiguousarray(vertices[:, 3:6])
+
+    return attributes
+
+def _read_range(filename: str, start: int, end: int) -> bytes:
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        return file.read(end - start)
+
+def _count_range(filename: str, start: int, end: int) -> tuple:
+    # ranges start at a line start, so their lines are found like in a whole file
+    data = _read_range(filename, start, end)
+    _, heads, selected = _record_lines(np.frombuffer(data, dtype=np.uint8), b'v')
+    if not selected.any():
+        return 0, None
+
+    first = int(heads[np.argmax(selected)])
+    line_end = data.find(b'\n', first)
+    return int(selected.sum()), len(data[first:line_end if line_end >= 0 else len(data)].split()) - 1
+
+def _parse_range(filename: str, start: int, end: int, memory_name: str, shape: tuple, row: int) -> int:
+    values = parse_records(_read_range(filename, start, end), b'v')
+    if len(values) and values.shape[1] != shape[1]:
+        raise ValueError(f'Inconsistent "v" records: expected {shape[1]} values per vertex, got {values.shape[1]}')
+
+    # write straight into the parent's array, nothing is pickled back
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        np.ndarray(shape, dtype=np.float32, buffer=memory.buf)[row:row + len(values)] = values
+    finally:
+        memory.close()
+    return len(values)
+
+def _split_ranges(filename: str, parts: int) -> list:
+    # cut the file into parts that start right after a newline
+    size = os.path.getsize(filename)
+    bounds = [0]
+    with open(filename, 'rb') as file:
+        for i in range(1, parts):
+            file.seek(max(i * size // parts - 1, bounds[-1]))
+            file.readline()
+            bounds.append(min(file.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def read_obj_parallel(filename: str, workers: int = None) -> np.ndarray:
+    workers = workers or os.cpu_count()
+    parts = max(workers, -(-os.path.getsize(filename) // PARALLEL_RANGE_BYTES))
+    ranges = _split_ranges(filename, parts)
+
+    # first pass: count the records of every range to know where its rows go
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        counts = list(pool.map(_count_range, *zip(*[(filename, start, end) for start, end in ranges])))
+
+    widths = {width for _, width in counts if width is not None}
+    if not widths:
+        return np.empty((0, 3), dtype=np.float32)
+    if len(widths) > 1:
+        raise ValueError(f'Inconsistent "v" records: found {sorted(widths)} values per vertex')
+
+    rows = np.concatenate(([0], np.cumsum([count for count, _ in counts])))
+    shape = (int(rows[-1]), widths.pop())
+
+    # second pass: every worker parses its range into the shared array; the pool is started
+    # after the block exists so the workers share the parent's resource tracker
+    memory = shared_memory.SharedMemory(create=True, size=max(shape[0] * shape[1] * 4, 1))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [
+                pool.submit(_parse_range, filename, start, end, memory.name, shape, int(row))
+                for (start, end), row in zip(ranges, rows)
+            ]
+            for job, (count, _) in zip(jobs, counts):
+                if job.result() != count:
+                    raise ValueError(f'Malformed "v" records in {filename}')
+
+        return np.array(np.ndarray(shape, dtype=np.float32, buffer=memory.buf)[:, :3])
+    finally:
+        memory.close()
+        memory.unlink()
+
+def read_obj(filename: str, workers: int = 1) -> np.ndarray:
+    # workers=None uses every core, files below PARALLEL_MIN_BYTES are not worth the process pool
+    if workers != 1 and os.path.getsize(filename) >= PARALLEL_MIN_BYTES:
+        return read_obj_parallel(filename, workers)
+
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    return np.ascontiguousarray(parse_records(data, b'v')[:, :3])
+
+def read_xyz(filename: str) -> np.ndarray:
+    # text XYZ files hold one "x y z [anything]" record per line
+    values = np.loadtxt(filename, dtype=np.float32, usecols=(0, 1, 2), comments='#', ndmin=2)
+    return np.ascontiguousarray(values)
+
+def read_ply_header(file) -> dict:
+    # expects a file opened in binary mode, leaves it positioned at the first element
+    if file.readline().strip() != b'ply':
+        raise ValueError('Not a PLY file')
+
+    header = {'format': None, 'elements': []}
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError('PLY header is missing end_header')
+
+        parts = line.decode('ascii').split()
+        if not parts or parts[0] in ('comment', 'obj_info'):
+            continue
+        elif parts[0] == 'format':
+            header['format'] = parts[1]
+        elif parts[0] == 'element':
+            header['elements'].append({'name': parts[1], 'count': int(parts[2]), 'properties': []})
+        elif parts[0] == 'property':
+            if parts[1] == 'list':  # variable length, only faces use these
+                header['elements'][-1]['properties'].append((parts[4], None))
+            else:
+                header['elements'][-1]['properties'].append((parts[2], PLY_TYPES[parts[1]]))
+        elif parts[0] == 'end_header':
+            break
+
+    header['header_size'] = file.tell()
+    return header
+
+def ply_vertex_dtype(header: dict) -> np.dtype:
+    # only the first element can be located without reading the ones before it
+    vertex = header['elements'][0] if header['elements'] else None
+    if vertex is None or vertex['name'] != 'vertex':
+        raise ValueError('PLY file must start with the vertex element')
+    if any(type is None for _, type in vertex['properties']):
+        raise ValueError('List properties on PLY vertices are not supported')
+
+    byte_order = '>' if header['format'] == 'binary_big_endian' else '<'
+    return np.dtype([(name, byte_order + type) for name, type in vertex['properties']])
+
+def _ply_positions(records: np.ndarray) -> np.ndarray:
+    return np.column_stack((records['x'], records['y'], records['z'])).astype(np.float32)
+
+def _rebatch(arrays, block_size: int):
+    # regroup arrays of arbitrary length into blocks of exactly block_size rows (except the last)
+    pending, pending_count = [], 0
+    for array in arrays:
+        while len(array):
+            take = min(block_size - pending_count, len(array))
+            pending.append(array[:take])
+            pending_count += take
+            array = array[take:]
+            if pending_count == block_size:
+                yield np.concatenate(pending)
+                pending, pending_count = [], 0
+
+    if pending_count:
+        yield np.concatenate(pending)
+
+def _iter_obj_chunks(filename: str):
+    with open(filename, 'rb') as file:
+        leftover = b''
+        while True:
+            chunk = file.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            # only parse whole lines, the rest waits for the next chunk
+            data = leftover + chunk
+            cut = data.rfind(b'\n') + 1
+            leftover = data[cut:]
+            yield parse_records(data[:cut], b'v')[:, :3]
+
+        if leftover:
+            yield parse_records(leftover, b'v')[:, :3]
+
+def iter_obj_blocks(filename: str, block_size: int = STREAM_BLOCK_SIZE):
+    yield from _rebatch(_iter_obj_chunks(filename), block_size)
+
+def iter_xyz_blocks(filename: str, block_size: int = STREAM_BLOCK_SIZE):
     with open(filename, 'r') as file:
-        for line in file:
-            parts = line.split()
-            if parts[0] == 'v':  # the line describes a vertex
-                vertices.append(list(map(float, parts[1:])))
+        while lines := list(itertools.islice(file, block_size)):
+            yield np.loadtxt(lines, dtype=np.float32, usecols=(0, 1, 2), comments='#', ndmin=2)
+
+def iter_ply_blocks(filename: str, block_size: int = STREAM_BLOCK_SIZE):
+    with open(filename, 'rb') as file:
+        header = read_ply_header(file)
+        dtype = ply_vertex_dtype(header)
+        count = header['elements'][0]['count']
+
+        if header['format'] == 'ascii':
+            columns = [dtype.names.index(axis) for axis in 'xyz']
+            text = io.TextIOWrapper(file, encoding='ascii')
+            for start in range(0, count, block_size):
+                lines = list(itertools.islice(text, min(block_size, count - start)))
+                yield np.loadtxt(lines, dtype=np.float32, usecols=columns, ndmin=2)
+        else:
+            for start in range(0, count, block_size):
+                data = file.read(min(block_size, count - start) * dtype.itemsize)
+                yield _ply_positions(np.frombuffer(data, dtype=dtype))
+
+def _field_view(records: np.ndarray, fields: tuple) -> np.ndarray:
+    if len(fields) == 1:
+        return records[fields[0]]
+
+    # fields of one type stored next to each other are exposed as an (N, len(fields)) view of the records
+    dtype, offset = records.dtype.fields[fields[0]][:2]
+    for i, field in enumerate(fields):
+        if records.dtype.fields[field][:2] != (dtype, offset + i * dtype.itemsize):
+            return np.column_stack([records[field] for field in fields])
+
+    return np.ndarray(
+        shape=(len(records), len(fields)), dtype=dtype, buffer=records,
+        offset=offset, strides=(records.dtype.itemsize, dtype.itemsize)
+    )
+
+def read_ply(filename: str) -> dict:
+    with open(filename, 'rb') as file:
+        header = read_ply_header(file)
+        dtype = ply_vertex_dtype(header)
+        count = header['elements'][0]['count']
+
+        if header['format'] == 'ascii':
+            vertices = np.loadtxt(io.TextIOWrapper(file, encoding='ascii'), dtype=dtype, max_rows=count, ndmin=1)
+
+    if header['format'] != 'ascii' and count == 0:
+        vertices = np.empty(0, dtype=dtype)
+    elif header['format'] != 'ascii':
+        # binary vertices are never copied, every attribute is a view into the memory map
+        vertices = np.memmap(filename, dtype=dtype, mode='r', offset=header['header_size'], shape=(count,))
+
+    attributes = {'vertices': vertices}
+    for name, fields in PLY_ATTRIBUTES.items():
+        if all(field in dtype.names for field in fields):
+            attributes[name] = _field_view(vertices, fields)
+
+    return attributes
+
+def write_ply(filename: str, positions: np.ndarray, normals: np.ndarray = None,
+              colors: np.ndarray = None, intensity: np.ndarray = None):
+    fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    if normals is not None:
+        fields += [('nx', '<f4'), ('ny', '<f4'), ('nz', '<f4')]
+    if colors is not None:
+        fields += [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+    if intensity is not None:
+        fields += [('intensity', '<f4')]
+
+    vertices = np.empty(len(positions), dtype=fields)
+    _field_view(vertices, PLY_ATTRIBUTES['positions'])[:] = positions
+    if normals is not None:
+        _field_view(vertices, PLY_ATTRIBUTES['normals'])[:] = normals
+    if colors is not None:
+        colors = np.asarray(colors)
+        if colors.dtype.kind == 'f':  # floating point colors are in the [0, 1] range
+            colors = np.clip(np.rint(colors * 255.0), 0, 255)
+        _field_view(vertices, PLY_ATTRIBUTES['colors'])[:] = colors
+    if intensity is not None:
+        vertices['intensity'] = intensity
+
+    type_names = {type: name for name, type in reversed(PLY_TYPES.items())}
+    header = ['ply', 'format binary_little_endian 1.0', f'element vertex {len(vertices)}']
+    header += [f'property {type_names[np.dtype(type).str[1:]]} {name}' for name, type in fields]
+    header += ['end_header', '']
+
+    with open(filename, 'wb') as file:
+        file.write('\n'.join(header).encode('ascii'))
+        file.write(vertices.data)
+
+def read_xyz_binary(filename: str) -> np.ndarray:
+    # packed little-endian float32 x, y, z triplets without any header
+    if os.path.getsize(filename) % 12:
+        raise ValueError(f'{filename} is not a packed float32 XYZ file')
+    return np.memmap(filename, dtype='<f4', mode='r').reshape(-1, 3)
+
+def iter_vertex_blocks(filename: str, block_size: int = STREAM_BLOCK_SIZE):
+    # yields (block_size, 3) float32 position blocks, so only one block is held in memory at a time
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.obj':
+        return iter_obj_blocks(filename, block_size)
+    elif extension == '.xyz':
+        return iter_xyz_blocks(filename, block_size)
+    elif extension == '.ply':
+        return iter_ply_blocks(filename, block_size)
+    raise ValueError(f'Unsupported point cloud format "{extension}"')
+
+def count_vertices(filename: str) -> int:
+    # exact for OBJ and PLY, an upper bound (the line count) for text XYZ
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.ply':
+        with open(filename, 'rb') as file:
+            return read_ply_header(file)['elements'][0]['count']
+
+    count = 0
+    with open(filename, 'rb') as file:
+        if extension == '.obj':
+            # only whole lines are counted, the rest waits for the next chunk
+            leftover = b''
+            while chunk := file.read(_READ_CHUNK_SIZE):
+                data = leftover + chunk
+                cut = data.rfind(b'\n') + 1
+                count += int(_record_lines(np.frombuffer(data[:cut], dtype=np.uint8), b'v')[2].sum())
+                leftover = data[cut:]
+            return count + int(_record_lines(np.frombuffer(leftover, dtype=np.uint8), b'v')[2].sum())
+
+        tail = b'\n'
+        while chunk := file.read(_READ_CHUNK_SIZE):
+            count += chunk.count(b'\n')
+            tail = chunk[-1:]
+
+        if tail != b'\n':
+            count += 1
 
-    return vertices
+    return count
 
 def read_shader_file(filename: str) -> str:
     with open(filename, 'r') as file:
-        return file.read()
\ No newline at end of file
+        return file.read()
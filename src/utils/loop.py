@@ -0,0 +1,58 @@
+import time
+
+import glfw
+
+
+class FrameScheduler:
+    def __init__(self, max_fps: float = None, idle_timeout: float = 0.25):
+        # idle_timeout bounds how long wait() blocks without events, so the loop can still poll
+        # for data updates (streamed blocks, edited shaders) while nothing is drawn
+        self.max_fps = max_fps
+        self.idle_timeout = idle_timeout
+
+        self.dirty = True
+        self.refinement = 0  # progressive refinement steps drawn since the last invalidate()
+        self._refine = False
+        self._next_frame = 0.0
+        self.frames = 0
+
+    def invalidate(self):
+        # the view or the data changed, start over from the coarsest refinement level
+        self.dirty = True
+        self.refinement = 0
+        self._refine = False
+
+    def refine(self):
+        # asks for one more frame at the next refinement level while nothing else changes
+        self._refine = True
+
+    def pending(self) -> bool:
+        return self.dirty or self._refine
+
+    def wait(self):
+        # processes events, blocking while there is nothing to draw or the next frame is not due yet
+        if not self.pending():
+            glfw.wait_events_timeout(self.idle_timeout)
+            return
+
+        remaining = self._next_frame - time.perf_counter()
+        if remaining > 0:
+            glfw.wait_events_timeout(remaining)
+        else:
+            glfw.poll_events()
+
+    def begin_frame(self) -> bool:
+        # True when a frame should be drawn now, consumes the dirty flag or the refinement request
+        now = time.perf_counter()
+        if not self.pending() or now < self._next_frame:
+            return False
+
+        if self.dirty:
+            self.dirty = False
+        else:
+            self.refinement += 1
+        self._refine = False
+
+        self._next_frame = now + 1.0 / self.max_fps if self.max_fps else now
+        self.frames += 1
+        return True
@@ -0,0 +1,126 @@
+import heapq
+
+import numpy as np
+
+
+_LEVEL_SHIFT = 60
+_AXIS_BITS = 20
+
+
+def _pack_keys(levels: np.ndarray, cells: np.ndarray) -> np.ndarray:
+    # level first, so sorting the keys orders the nodes level by level
+    cells = cells.astype(np.int64)
+    return (
+        (levels.astype(np.int64) << _LEVEL_SHIFT)
+        | (cells[:, 0] << (2 * _AXIS_BITS)) | (cells[:, 1] << _AXIS_BITS) | cells[:, 2]
+    )
+
+
+class Octree:
+    def __init__(self, points: np.ndarray, max_depth: int = 10, sample_resolution: int = 32):
+        # every node keeps one point per cell of a sample_resolution^3 grid laid over it, points
+        # not picked at a level move down to the next one, so each level refines the ones above
+        if max_depth >= _AXIS_BITS:
+            raise ValueError(f'max_depth must be below {_AXIS_BITS}')
+
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        self.origin = points.min(axis=0).astype(np.float64)
+        self.size = float((points.max(axis=0) - self.origin).max()) or 1.0
+
+        # position of every point in [0, 1) of the bounding cube
+        unit = np.minimum((points - self.origin) / self.size, np.nextafter(1.0, 0.0))
+
+        levels = np.full(len(points), max_depth, dtype=np.int64)
+        remaining = np.arange(len(points))
+        for level in range(max_depth):
+            if len(remaining) == 0:
+                break
+            samples = np.floor(unit[remaining] * (sample_resolution << level)).astype(np.int64)
+            resolution = sample_resolution << level
+            sample_keys = (samples[:, 0] * resolution + samples[:, 1]) * resolution + samples[:, 2]
+            _, picked = np.unique(sample_keys, return_index=True)
+
+            levels[remaining[picked]] = level
+            remaining = np.delete(remaining, picked)
+
+        cells = np.floor(unit * (1 << levels)[:, None]).astype(np.int64)
+        keys = _pack_keys(levels, cells)
+
+        # reorder the points so every node is one contiguous range, shuffled inside the node so
+        # any prefix of it is an even subsample
+        shuffled = np.random.default_rng(0).permutation(len(points))
+        self.order = shuffled[np.argsort(keys[shuffled], kind='stable')]
+        node_keys, self.starts, self.counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+        self.levels = node_keys >> _LEVEL_SHIFT
+        mask = (1 << _AXIS_BITS) - 1
+        self.cells = np.stack([
+            (node_keys >> (2 * _AXIS_BITS)) & mask, (node_keys >> _AXIS_BITS) & mask, node_keys & mask
+        ], axis=1)
+
+        # bounding sphere of every node
+        node_sizes = self.size / (1 << self.levels)
+        self.centers = self.origin + (self.cells + 0.5) * node_sizes[:, None]
+        self.radii = node_sizes * np.sqrt(3) / 2
+
+        # every node has a parent: the parent's region held the points that were not picked there
+        parents = np.searchsorted(node_keys, _pack_keys(self.levels - 1, self.cells >> 1))
+        parents[self.levels == 0] = -1
+        self.children = [[] for _ in range(len(node_keys))]
+        for node, parent in enumerate(parents):
+            if parent >= 0:
+                self.children[parent].append(node)
+        self.roots = list(np.flatnonzero(parents < 0))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def project(self, transform: np.ndarray, viewport_height: int) -> tuple:
+        # transform is laid out as glUniformMatrix4fv receives it, so clip = point @ transform
+        transform = np.asarray(transform, dtype=np.float64).reshape(4, 4)
+        clip = np.hstack([self.centers, np.ones((len(self), 1))]) @ transform
+
+        # radius in clip space scaled by the largest axis scale of the transform, then to pixels
+        scale = np.linalg.norm(transform[:3, :3], axis=1).max()
+        w = np.maximum(clip[:, 3], 1e-6)
+        radii = self.radii * scale / w
+
+        visible = np.all(np.abs(clip[:, :3] / w[:, None]) <= 1.0 + radii[:, None], axis=1) & (clip[:, 3] > 0)
+        return radii * viewport_height, visible
+
+    def select(self, transform: np.ndarray, viewport_height: int, point_budget: int,
+               min_pixel_size: float = 1.0) -> tuple:
+        # visits the largest nodes on screen first until the budget is spent; returns the
+        # (firsts, counts) ranges to hand to multi_draw_arrays
+        pixel_sizes, visible = self.project(transform, viewport_height)
+
+        heap = [(-pixel_sizes[node], node) for node in self.roots if visible[node]]
+        heapq.heapify(heap)
+
+        selected, budget = [], point_budget
+        while heap and budget > 0:
+            _, node = heapq.heappop(heap)
+            if self.counts[node] > budget:
+                # the last node only gets what is left of the budget
+                selected.append((self.starts[node], budget))
+                break
+            selected.append((self.starts[node], self.counts[node]))
+            budget -= self.counts[node]
+
+            for child in self.children[node]:
+                if visible[child] and pixel_sizes[child] >= min_pixel_size:
+                    heapq.heappush(heap, (-pixel_sizes[child], child))
+
+        selected = np.array(sorted(selected), dtype=np.int64).reshape(-1, 2)
+        return merge_ranges(selected[:, 0], selected[:, 1])
+
+
+def merge_ranges(firsts: np.ndarray, counts: np.ndarray) -> tuple:
+    # joins ranges that follow each other so fewer draws are issued; expects sorted firsts
+    if len(firsts) == 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+
+    breaks = np.flatnonzero(firsts[1:] != firsts[:-1] + counts[:-1]) + 1
+    starts = np.concatenate(([0], breaks))
+    merged_counts = np.add.reduceat(counts, starts)
+    return firsts[starts].astype(np.int32), merged_counts.astype(np.int32)
@@ -0,0 +1,122 @@
+from OpenGL.GL import *
+import ctypes
+import os
+
+import numpy as np
+
+
+# PYOPENGL_PLATFORM has to name the same backend before OpenGL is first imported
+BACKENDS = ('egl', 'osmesa')
+
+
+def _attribute_list(type, values: list):
+    return (type * len(values))(*values)
+
+
+class OffscreenContext:
+    def __init__(self, backend: str = 'egl', width: int = 1200, height: int = 1200):
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown offscreen backend "{backend}", expected one of {BACKENDS}')
+
+        self.backend = backend
+        self.width = width
+        self.height = height
+
+        if backend == 'egl':
+            self._create_egl_context()
+        else:
+            self._create_osmesa_context()
+        self._create_framebuffer()
+
+    def _create_egl_context(self):
+        from OpenGL import EGL
+
+        # without a display server Mesa's default platform cannot initialize, its surfaceless one can
+        os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+        self._display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self._display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError('Could not initialize the EGL display')
+
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        EGL.eglChooseConfig(self._display, _attribute_list(EGL.EGLint, [
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8, EGL.EGL_ALPHA_SIZE, 8,
+            EGL.EGL_NONE,
+        ]), ctypes.pointer(config), 1, ctypes.pointer(count))
+        if count.value == 0:
+            raise RuntimeError('No EGL config supports desktop OpenGL with pbuffers')
+
+        # the pbuffer only makes the context current, rendering goes to the framebuffer object
+        self._surface = EGL.eglCreatePbufferSurface(self._display, config, _attribute_list(EGL.EGLint, [
+            EGL.EGL_WIDTH, 1, EGL.EGL_HEIGHT, 1, EGL.EGL_NONE,
+        ]))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        self._context = EGL.eglCreateContext(self._display, config, EGL.EGL_NO_CONTEXT, _attribute_list(EGL.EGLint, [
+            EGL.EGL_CONTEXT_MAJOR_VERSION, 4,
+            EGL.EGL_CONTEXT_MINOR_VERSION, 1,
+            EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+            EGL.EGL_NONE,
+        ]))
+        if self._context == EGL.EGL_NO_CONTEXT:
+            raise RuntimeError('Could not create an OpenGL 4.1 core EGL context')
+        EGL.eglMakeCurrent(self._display, self._surface, self._surface, self._context)
+
+    def _create_osmesa_context(self):
+        from OpenGL import osmesa
+
+        self._context = osmesa.OSMesaCreateContextAttribs(_attribute_list(ctypes.c_int, [
+            osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+            osmesa.OSMESA_DEPTH_BITS, 24,
+            osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+            osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 4,
+            osmesa.OSMESA_CONTEXT_MINOR_VERSION, 1,
+            0,
+        ]), None)
+        if not self._context:
+            raise RuntimeError('Could not create an OpenGL 4.1 core OSMesa context')
+
+        # OSMesa renders into client memory, which has to outlive the context
+        self._buffer = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        if not osmesa.OSMesaMakeCurrent(self._context, self._buffer, GL_UNSIGNED_BYTE, self.width, self.height):
+            raise RuntimeError('Could not make the OSMesa context current')
+
+    def _create_framebuffer(self):
+        self.framebuffer = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+
+        self._color, self._depth = glGenRenderbuffers(2)
+        glBindRenderbuffer(GL_RENDERBUFFER, self._color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self._color)
+        glBindRenderbuffer(GL_RENDERBUFFER, self._depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self._depth)
+
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError('Offscreen framebuffer is incomplete')
+        glViewport(0, 0, self.width, self.height)
+
+    def bind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, self.width, self.height)
+
+    def read_pixels(self) -> np.ndarray:
+        self.bind()
+        pixels = glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE)
+        return np.frombuffer(pixels, dtype=np.uint8).reshape(self.height, self.width, 4)[::-1]
+
+    def destroy(self):
+        glDeleteFramebuffers(1, [self.framebuffer])
+        glDeleteRenderbuffers(2, [self._color, self._depth])
+
+        if self.backend == 'egl':
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self._display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(self._display, self._context)
+            EGL.eglDestroySurface(self._display, self._surface)
+            EGL.eglTerminate(self._display)
+        else:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self._context)
@@ -0,0 +1,85 @@
+from OpenGL.GL import *
+import numpy as np
+
+from utils.program import ShaderProgram
+from utils.shaders import compile_program
+
+
+# the accumulation target holds weighted sums of hundreds of splats per pixel in dense clouds,
+# which overflows half floats, the revealage target only ever shrinks towards 0
+ACCUM_FORMAT = GL_RGBA32F
+REVEALAGE_FORMAT = GL_R16F
+
+
+class WeightedBlendedOIT:
+    def __init__(self, width: int, height: int, cache=None):
+        self.width = 0
+        self.height = 0
+
+        self.framebuffer = glGenFramebuffers(1)
+        self.accum, self.revealage = glGenTextures(2)
+        self.resize(width, height)
+
+        self.composite_shader = ShaderProgram(compile_program('fullscreen.vert', None, 'oit_composite.frag', cache=cache))
+        self.composite_shader.set('accumTexture', 0)
+        self.composite_shader.set('revealageTexture', 1)
+
+        # the full-screen triangle has no attributes, but core profiles still need a vao bound
+        self._vao = glGenVertexArrays(1)
+
+    def _allocate(self, texture: int, format, components):
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, format, self.width, self.height, 0, components, GL_FLOAT, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+
+    def resize(self, width: int, height: int):
+        if (width, height) == (self.width, self.height) or width == 0 or height == 0:
+            return
+        self.width, self.height = width, height
+
+        self._allocate(self.accum, ACCUM_FORMAT, GL_RGBA)
+        self._allocate(self.revealage, REVEALAGE_FORMAT, GL_RED)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.accum, 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT1, GL_TEXTURE_2D, self.revealage, 0)
+        glDrawBuffers(2, [GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1])
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError('Weighted blended OIT framebuffer is incomplete')
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def begin(self):
+        # splats drawn after this accumulate into the float targets, in any order
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, self.width, self.height)
+        glClearBufferfv(GL_COLOR, 0, np.zeros(4, dtype=np.float32))
+        glClearBufferfv(GL_COLOR, 1, np.ones(4, dtype=np.float32))
+
+        glDepthMask(GL_FALSE)
+        glEnable(GL_BLEND)
+        glBlendFunci(0, GL_ONE, GL_ONE)
+        glBlendFunci(1, GL_ZERO, GL_ONE_MINUS_SRC_COLOR)
+
+    def composite(self, framebuffer: int = 0):
+        # one full-screen pass blending the weighted average over what the target already holds
+        glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+        glViewport(0, 0, self.width, self.height)
+        glDepthMask(GL_TRUE)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.accum)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_2D, self.revealage)
+
+        self.composite_shader.use()
+        glBindVertexArray(self._vao)
+        glDrawArrays(GL_TRIANGLES, 0, 3)
+        glActiveTexture(GL_TEXTURE0)
+
+    def delete(self):
+        glDeleteFramebuffers(1, [self.framebuffer])
+        glDeleteTextures(2, [self.accum, self.revealage])
+        glDeleteVertexArrays(1, [self._vao])
+        self.composite_shader.delete()
@@ -0,0 +1,121 @@
+from OpenGL.GL import *
+import numpy as np
+
+
+# numpy type, components and upload function of every uniform type the shaders use
+UNIFORM_SETTERS = {
+    GL_FLOAT: (np.float32, 1, glUniform1fv),
+    GL_FLOAT_VEC2: (np.float32, 2, glUniform2fv),
+    GL_FLOAT_VEC3: (np.float32, 3, glUniform3fv),
+    GL_FLOAT_VEC4: (np.float32, 4, glUniform4fv),
+    GL_FLOAT_MAT4: (np.float32, 16, lambda location, count, value: glUniformMatrix4fv(location, count, GL_FALSE, value)),
+    GL_INT: (np.int32, 1, glUniform1iv),
+    GL_BOOL: (np.int32, 1, glUniform1iv),
+    GL_SAMPLER_2D: (np.int32, 1, glUniform1iv),
+}
+
+# alignment, size, components and type of the std140 members the uniform blocks use
+STD140_TYPES = {
+    'float': (4, 4, 1, np.float32),
+    'int': (4, 4, 1, np.int32),
+    'bool': (4, 4, 1, np.int32),  # a 4 byte integer in std140 blocks
+    'vec2': (8, 8, 2, np.float32),
+    'vec3': (16, 12, 3, np.float32),
+    'vec4': (16, 16, 4, np.float32),
+    'mat4': (16, 64, 16, np.float32),
+}
+
+
+class ShaderProgram:
+    # program in use, kept here so use() only calls glUseProgram when it changes
+    _current = None
+
+    def __init__(self, program: int):
+        self.program = program
+
+        # reflect the active uniforms once, members of uniform blocks have no location
+        self.uniforms = {}
+        for index in range(glGetProgramiv(program, GL_ACTIVE_UNIFORMS)):
+            name, count, type = glGetActiveUniform(program, index)
+            if isinstance(name, np.ndarray):  # PyOpenGL returns the name as a zero terminated char array
+                name = name.tobytes().split(b'\0')[0]
+            name = name.decode() if isinstance(name, bytes) else name
+            location = glGetUniformLocation(program, name)
+            if location >= 0:
+                self.uniforms[name.removesuffix('[0]')] = (location, count, type)
+
+        self._values = {}
+
+    def use(self):
+        if ShaderProgram._current != self.program:
+            glUseProgram(self.program)
+            ShaderProgram._current = self.program
+
+    def set(self, name: str, value):
+        # like glUniform* on location -1, values for uniforms the linker dropped are ignored
+        if name not in self.uniforms:
+            return
+        location, count, type = self.uniforms[name]
+        dtype, components, setter = UNIFORM_SETTERS[type]
+
+        value = np.asarray(value, dtype=dtype)
+        previous = self._values.get(name)
+        if previous is not None and np.array_equal(previous, value):
+            return
+
+        self.use()
+        setter(location, min(count, max(1, value.size // components)), value)
+        self._values[name] = value.copy()
+
+    def bind_block(self, name: str, binding: int):
+        index = glGetUniformBlockIndex(self.program, name)
+        if index != GL_INVALID_INDEX:
+            glUniformBlockBinding(self.program, index, binding)
+
+    def delete(self):
+        if ShaderProgram._current == self.program:
+            ShaderProgram._current = None
+        glDeleteProgram(self.program)
+
+
+class UniformBuffer:
+    def __init__(self, layout: list, binding: int):
+        # layout is a list of (name, type) in declaration order, offsets follow the std140 rules
+        self.fields = {}
+        offset = 0
+        for name, type in layout:
+            alignment, size, components, dtype = STD140_TYPES[type]
+            offset = -(-offset // alignment) * alignment
+            self.fields[name] = (offset, components, dtype)
+            offset += size
+
+        # a block takes a multiple of 16 bytes
+        self.data = np.zeros(-(-offset // 16) * 16, dtype=np.uint8)
+        self.binding = binding
+
+        self.buffer = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.buffer)
+        glBufferData(GL_UNIFORM_BUFFER, self.data.nbytes, self.data, GL_DYNAMIC_DRAW)
+        glBindBufferBase(GL_UNIFORM_BUFFER, binding, self.buffer)
+
+    def update(self, **values):
+        # writes the changed members and uploads the bytes between the first and last of them at once
+        start, end = len(self.data), 0
+        for name, value in values.items():
+            offset, components, dtype = self.fields[name]
+            value = np.asarray(value, dtype=dtype).reshape(-1)
+            if len(value) != components:
+                raise ValueError(f'Uniform block member {name} takes {components} values, got {len(value)}')
+
+            member = self.data[offset:offset + value.nbytes].view(dtype)
+            if np.array_equal(member, value):
+                continue
+            member[:] = value
+            start, end = min(start, offset), max(end, offset + value.nbytes)
+
+        if start < end:
+            glBindBuffer(GL_UNIFORM_BUFFER, self.buffer)
+            glBufferSubData(GL_UNIFORM_BUFFER, start, end - start, self.data[start:end])
+
+    def delete(self):
+        glDeleteBuffers(1, [self.buffer])
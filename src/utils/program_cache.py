@@ -0,0 +1,114 @@
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileShader
+import hashlib
+import os
+
+import numpy as np
+
+from utils.cache import DEFAULT_CACHE_DIRECTORY
+
+
+DEFAULT_PROGRAM_CACHE_DIRECTORY = os.path.join(DEFAULT_CACHE_DIRECTORY, 'programs')
+
+
+class ProgramCache:
+    def __init__(self, directory: str = DEFAULT_PROGRAM_CACHE_DIRECTORY):
+        self.directory = directory
+        self._driver = None
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def driver(self) -> str:
+        # binaries only load on the driver that produced them, needs a current context
+        if self._driver is None:
+            self._driver = '\n'.join(
+                glGetString(name).decode(errors='replace') for name in (GL_VENDOR, GL_RENDERER, GL_VERSION)
+            )
+        return self._driver
+
+    def key(self, stages: list) -> str:
+        digest = hashlib.blake2b(self.driver().encode(), digest_size=16)
+        for source, stage in stages:
+            digest.update(f'\n{int(stage)}\n'.encode())
+            digest.update(source.encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.bin')
+
+    def load(self, key: str):
+        # returns the linked program, or None when there is no binary or the driver rejects it
+        try:
+            with open(self._path(key), 'rb') as file:
+                data = file.read()
+        except OSError:
+            return None
+        if len(data) <= 4:
+            return None
+
+        binary_format = int.from_bytes(data[:4], 'little')
+        binary = np.frombuffer(data, dtype=np.uint8, offset=4)
+
+        program = glCreateProgram()
+        try:
+            glProgramBinary(program, binary_format, binary, len(binary))
+            linked = glGetProgramiv(program, GL_LINK_STATUS)
+        except GLError:  # GL_INVALID_ENUM, a binary format this driver does not support (any more)
+            linked = False
+        if not linked:
+            # driver updates invalidate old binaries, drop it so compile() links from source and stores a fresh one
+            glDeleteProgram(program)
+            os.remove(self._path(key))
+            return None
+        return program
+
+    def store(self, key: str, program: int):
+        length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+        if length == 0:
+            return
+
+        written = np.zeros(1, dtype=np.int32)
+        binary_format = np.zeros(1, dtype=np.uint32)
+        binary = np.zeros(length, dtype=np.uint8)
+        glGetProgramBinary(program, length, written, binary_format, binary)
+
+        path = self._path(key)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(int(binary_format[0]).to_bytes(4, 'little'))
+            file.write(binary[:written[0]].tobytes())
+        os.replace(path + '.tmp', path)
+
+    def compile(self, stages: list) -> int:
+        # stages is a list of (source, shader type), like the arguments of compileShader
+        key = self.key(stages)
+        program = self.load(key)
+        if program is not None:
+            self.hits += 1
+            return program
+        self.misses += 1
+
+        shaders = [compileShader(source, stage) for source, stage in stages]
+        program = glCreateProgram()
+        for shader in shaders:
+            glAttachShader(program, shader)
+        # the hint has to be set before linking for glGetProgramBinary to return anything
+        glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+        glLinkProgram(program)
+
+        for shader in shaders:
+            glDetachShader(program, shader)
+            glDeleteShader(shader)
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            log = glGetProgramInfoLog(program)
+            glDeleteProgram(program)
+            raise RuntimeError(f'Shader program failed to link: {log.decode(errors="replace") if isinstance(log, bytes) else log}')
+
+        self.store(key, program)
+        return program
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.bin'):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,94 @@
+import numpy as np
+
+from utils.cloud import SPLAT_SIZE_RANGE
+
+
+SIZE_ENCODINGS = ('half', 'log8')
+
+_POSITION_STEPS = np.iinfo(np.uint16).max
+_LOG_SIZE_STEPS = np.iinfo(np.uint8).max
+
+
+def quantize_positions(points: np.ndarray) -> tuple:
+    # 16 bit normalized coordinates inside the bounding box, decoded as offset + value * scale
+    # in the vertex shader, where value is the normalized [0, 1] attribute
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    offset = points.min(axis=0).astype(np.float64)
+    scale = points.max(axis=0) - offset
+    scale[scale == 0] = 1.0
+
+    quantized = np.rint((points - offset) / scale * _POSITION_STEPS).astype(np.uint16)
+    return quantized, offset.astype(np.float32), scale.astype(np.float32)
+
+def dequantize_positions(quantized: np.ndarray, offset: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    return (offset + quantized / _POSITION_STEPS * scale).astype(np.float32)
+
+def position_error_bound(offset: np.ndarray, scale: np.ndarray) -> float:
+    # rounding moves every coordinate by at most half a step, extent / 65535 / 2 along each axis,
+    # plus the float32 rounding of the decoded coordinate
+    largest = np.max(np.abs(offset) + np.abs(scale))
+    return float(np.max(scale) / _POSITION_STEPS / 2 + largest * np.finfo(np.float32).eps)
+
+def encode_sizes_log8(sizes: np.ndarray, size_range: tuple = SPLAT_SIZE_RANGE) -> np.ndarray:
+    # the sizes span orders of magnitude, so the 256 steps are spread evenly over their logarithm
+    low, high = np.log(size_range[0]), np.log(size_range[1])
+    logs = (np.log(np.clip(sizes, *size_range)) - low) / (high - low)
+    return np.rint(logs * _LOG_SIZE_STEPS).astype(np.uint8)
+
+def decode_sizes_log8(encoded: np.ndarray, size_range: tuple = SPLAT_SIZE_RANGE) -> np.ndarray:
+    low, high = np.log(size_range[0]), np.log(size_range[1])
+    return np.exp(low + encoded / _LOG_SIZE_STEPS * (high - low)).astype(np.float32)
+
+def size_error_bound(size_encoding: str, size_range: tuple = SPLAT_SIZE_RANGE) -> float:
+    # relative error of a decoded size: half a log step for log8 (1.8% over the default range) plus
+    # the float32 rounding of the decoded value and of the size it is compared to, half a unit in
+    # the last place of the 10 bit mantissa for half floats, which float32 holds exactly
+    if size_encoding == 'log8':
+        step = np.expm1(np.log(size_range[1] / size_range[0]) / _LOG_SIZE_STEPS / 2)
+        return float((1 + step) * (1 + np.finfo(np.float32).eps) - 1)
+    return float(2.0 ** -11)
+
+def pack_colors(colors: np.ndarray) -> np.ndarray:
+    # RGBA8, floating point colors are in the [0, 1] range, missing alpha is opaque
+    colors = np.asarray(colors)
+    if colors.dtype.kind == 'f':
+        colors = np.clip(np.rint(colors * 255.0), 0, 255)
+    packed = np.full((len(colors), 4), 255, dtype=np.uint8)
+    packed[:, :colors.shape[1]] = colors
+    return packed
+
+def quantize_vertices(points: np.ndarray, sizes: np.ndarray = None, colors: np.ndarray = None,
+                      size_encoding: str = 'half', size_range: tuple = SPLAT_SIZE_RANGE) -> tuple:
+    # returns the records for create_vao plus the values set_quantization_uniforms needs to decode them;
+    # a position with a half float size takes 8 bytes instead of 16, 12 with a color instead of 28
+    if size_encoding not in SIZE_ENCODINGS:
+        raise ValueError(f'Unknown size encoding "{size_encoding}", expected one of {SIZE_ENCODINGS}')
+
+    positions, offset, scale = quantize_positions(points)
+
+    # every attribute starts on an even byte and the records stay a multiple of 4 bytes long
+    names, formats, offsets = ['position'], [('u2', (3,))], [0]
+    if sizes is not None:
+        names.append('size')
+        formats.append('f2' if size_encoding == 'half' else 'u1')
+        offsets.append(6)
+    if colors is not None:
+        names.append('color')
+        formats.append(('u1', (4,)))
+        offsets.append(8)
+    itemsize = 12 if colors is not None else 8
+
+    vertices = np.zeros(len(positions), dtype={'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': itemsize})
+    vertices['position'] = positions
+    if sizes is not None:
+        sizes = np.asarray(sizes).reshape(-1)
+        vertices['size'] = sizes if size_encoding == 'half' else encode_sizes_log8(sizes, size_range)
+    if colors is not None:
+        vertices['color'] = pack_colors(colors)
+
+    encoding = {
+        'position_offset': offset,
+        'position_scale': scale,
+        'size_log_range': np.log(size_range).astype(np.float32) if sizes is not None and size_encoding == 'log8' else None,
+    }
+    return vertices, encoding
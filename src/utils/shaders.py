@@ -0,0 +1,143 @@
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
+import os
+
+import numpy as np
+
+from utils.files import read_shader_file
+from utils.program import ShaderProgram, UniformBuffer
+from utils.program_cache import ProgramCache
+
+
+SHADER_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shaders')
+
+# vertex, geometry and fragment shader of every splat variant
+SPLAT_VARIANTS = {
+    'circle': ('base.vert', 'circle.geom', 'base.frag'),
+    'square': ('base.vert', 'square.geom', 'base.frag'),
+    'dynamic_circle': ('dynamic_size.vert', 'dynamic_size_circle.geom', 'base.frag'),
+    'dynamic_square': ('dynamic_size.vert', 'dynamic_size_square.geom', 'base.frag'),
+    # point sprites skip the geometry stage, they need GL_PROGRAM_POINT_SIZE enabled
+    'point_sprite': ('point_sprite.vert', None, 'point_sprite.frag'),
+    'dynamic_point_sprite': ('dynamic_size_point_sprite.vert', None, 'point_sprite.frag'),
+    # instanced quads are drawn with draw_instanced from a create_vao_instanced vao
+    'instanced_quad': ('instanced_quad.vert', None, 'instanced_quad.frag'),
+    'dynamic_instanced_quad': ('dynamic_size_instanced_quad.vert', None, 'instanced_quad.frag'),
+}
+SPLAT_SHAPES = ('circle', 'square', 'point_sprite', 'instanced_quad')
+
+DEFAULT_SPLAT_SIZE = 0.01
+DEFAULT_SPLAT_COLOR = (0.41, 0.87, 0.98)
+DEFAULT_TRANSPARENCY = 0.5
+DEFAULT_LUMINANCE = 1.0
+
+# the Frame uniform block of every splat shader, in declaration order; compile_program declares it
+# in every stage, the shader files only use its members
+FRAME_LAYOUT = [
+    ('transform', 'mat4'),
+    ('splatColor', 'vec3'),
+    ('transparency', 'float'),
+    ('luminance', 'float'),
+    ('size', 'float'),
+    ('viewportHeight', 'float'),
+    ('weightedBlended', 'bool'),  # fragment shaders write the weighted blended OIT targets
+]
+FRAME_BINDING = 0
+
+FRAME_PRELUDE = 'layout (std140) uniform Frame\n{\n' + ''.join(
+    f'    {type} {name};\n' for name, type in FRAME_LAYOUT
+) + '};\n'
+
+# files in shaders/ compile_program puts after the Frame block of every stage of their type: the
+# uniforms and decode functions of the quantized vertex encoding, and the weighted blended OIT weight
+STAGE_PRELUDES = {GL_VERTEX_SHADER: 'prelude.vert', GL_FRAGMENT_SHADER: 'prelude.frag'}
+
+
+def splat_variant(dynamic_sizing: bool, shape: str = 'circle') -> str:
+    if shape not in SPLAT_SHAPES:
+        raise ValueError(f'Unknown splat shape "{shape}", expected one of {SPLAT_SHAPES}')
+    return f'dynamic_{shape}' if dynamic_sizing else shape
+
+def is_dynamic(variant: str) -> bool:
+    # dynamic variants read the per-point size from attribute 1 (see create_vao_sized)
+    return variant.startswith('dynamic_')
+
+def is_instanced(variant: str) -> bool:
+    return variant.endswith('instanced_quad')
+
+def with_prelude(source: str, stage=None) -> str:
+    # the preludes go right after the #version line, which has to stay the first statement
+    prelude = FRAME_PRELUDE
+    if stage in STAGE_PRELUDES:
+        prelude += read_shader_file(os.path.join(SHADER_DIRECTORY, STAGE_PRELUDES[stage]))
+    version, newline, body = source.partition('\n')
+    if not version.startswith('#version'):
+        return prelude + source
+    return version + newline + prelude + body
+
+def compile_program(vertex: str, geometry: str, fragment: str, cache: ProgramCache = None) -> int:
+    # with a cache, a program linked on an earlier run is loaded as a binary instead
+    stages = [
+        (with_prelude(read_shader_file(os.path.join(SHADER_DIRECTORY, name)), stage), stage)
+        for name, stage in [(vertex, GL_VERTEX_SHADER), (geometry, GL_GEOMETRY_SHADER), (fragment, GL_FRAGMENT_SHADER)]
+        if name is not None
+    ]
+    if cache is not None:
+        return cache.compile(stages)
+    return compileProgram(*[compileShader(source, stage) for source, stage in stages])
+
+def create_splat_shader(variant: str, cache: ProgramCache = None) -> ShaderProgram:
+    shader = ShaderProgram(compile_program(*SPLAT_VARIANTS[variant], cache=cache))
+    shader.bind_block('Frame', FRAME_BINDING)
+    return shader
+
+def create_frame_uniforms(viewport_height: int = 1200) -> UniformBuffer:
+    # one buffer feeds the Frame block of every splat program
+    frame = UniformBuffer(FRAME_LAYOUT, FRAME_BINDING)
+    frame.update(transform=np.identity(4), viewportHeight=viewport_height)
+    set_splat_uniforms(frame)
+    return frame
+
+def set_splat_uniforms(frame: UniformBuffer, size: float = DEFAULT_SPLAT_SIZE, color: tuple = DEFAULT_SPLAT_COLOR,
+                       transparency: float = DEFAULT_TRANSPARENCY, luminance: float = DEFAULT_LUMINANCE):
+    frame.update(size=size, splatColor=color, transparency=transparency, luminance=luminance)
+
+def set_instance_colors(shader: ShaderProgram, instance_colors: bool):
+    # instanced quads take the color from attribute 3 instead of splatColor
+    shader.set('instanceColors', instance_colors)
+
+def set_quantization_uniforms(shader: ShaderProgram, encoding: dict):
+    # decodes the records of quantize_vertices, pass None to go back to float32 attributes
+    shader.set('quantizedPositions', encoding is not None)
+    shader.set('sizeLogEncoded', encoding is not None and encoding['size_log_range'] is not None)
+    if encoding is None:
+        return
+
+    shader.set('positionScale', encoding['position_scale'])
+    shader.set('positionOffset', encoding['position_offset'])
+    if encoding['size_log_range'] is not None:
+        shader.set('sizeLogRange', encoding['size_log_range'])
+
+
+class ShaderWatcher:
+    # polls the modification times of the files of a splat variant for live reloading
+    def __init__(self, variant: str):
+        names = [name for name in SPLAT_VARIANTS[variant] if name is not None] + list(STAGE_PRELUDES.values())
+        self.paths = [os.path.join(SHADER_DIRECTORY, name) for name in names]
+        self._mtimes = self._stat()
+
+    def _stat(self) -> list:
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:  # editors may replace the file while saving
+                mtimes.append(None)
+        return mtimes
+
+    def changed(self) -> bool:
+        mtimes = self._stat()
+        if mtimes == self._mtimes or None in mtimes:
+            return False
+        self._mtimes = mtimes
+        return True
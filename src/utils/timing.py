@@ -0,0 +1,113 @@
+from OpenGL.GL import *
+from collections import deque
+from contextlib import contextmanager
+import ctypes
+import json
+import time
+
+import numpy as np
+
+
+def rolling_stats(values) -> dict:
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return {'mean': 0.0, 'p95': 0.0, 'max': 0.0}
+    return {'mean': float(values.mean()), 'p95': float(np.percentile(values, 95)), 'max': float(values.max())}
+
+
+class GpuTimer:
+    def __init__(self, ring_size: int = 4, window: int = 240, log_path: str = None, enabled: bool = True):
+        # every pass cycles through ring_size queries and results are only read once the GPU
+        # reports them available, so nothing waits on the GPU; a pass whose next query is still
+        # in flight is timed on the CPU only for that frame
+        self.enabled = enabled
+        self.ring_size = ring_size
+        self.window = window
+
+        self._rings = {}  # pass -> (queries, next index)
+        self._in_flight = deque()  # (frame, pass, query) in submission order
+        self._busy = set()
+        self._frames = {}  # frame -> {pass: {'cpu_ms': ..., 'gpu_ms': ...}} until every query is read
+        self._elapsed = ctypes.c_uint64()  # PyOpenGL has no array type for 64 bit query results
+        self._available = np.zeros(1, dtype=np.int32)
+
+        self.frame = 0
+        self.dropped = 0
+        self.gpu_ms = {}
+        self.cpu_ms = {}
+        self._log = open(log_path, 'a', buffering=1) if log_path and enabled else None
+
+    def _acquire(self, name: str):
+        if name not in self._rings:
+            self._rings[name] = [list(glGenQueries(self.ring_size)), 0]
+        queries, index = self._rings[name]
+        query = queries[index]
+        if query in self._busy:
+            self.dropped += 1
+            return None
+        self._rings[name][1] = (index + 1) % self.ring_size
+        return query
+
+    @contextmanager
+    def measure(self, name: str, gpu: bool = True):
+        # GL_TIME_ELAPSED queries cannot nest, so measured passes have to follow each other
+        if not self.enabled:
+            yield
+            return
+
+        query = self._acquire(name) if gpu else None
+        if query is not None:
+            glBeginQuery(GL_TIME_ELAPSED, query)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cpu_ms = (time.perf_counter() - start) * 1000
+            if query is not None:
+                glEndQuery(GL_TIME_ELAPSED)
+                self._in_flight.append((self.frame, name, query))
+                self._busy.add(query)
+
+            self._frames.setdefault(self.frame, {})[name] = {'cpu_ms': cpu_ms}
+            self.cpu_ms.setdefault(name, deque(maxlen=self.window)).append(cpu_ms)
+
+    def end_frame(self):
+        # reads every finished query without blocking, then logs the frames that are complete
+        if not self.enabled:
+            return
+
+        while self._in_flight:
+            frame, name, query = self._in_flight[0]
+            glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE, self._available)
+            if not self._available[0]:
+                break  # queries finish in submission order
+            glGetQueryObjectui64v(query, GL_QUERY_RESULT, ctypes.byref(self._elapsed))
+            self._in_flight.popleft()
+            self._busy.discard(query)
+
+            gpu_ms = self._elapsed.value / 1e6
+            self._frames[frame][name]['gpu_ms'] = gpu_ms
+            self.gpu_ms.setdefault(name, deque(maxlen=self.window)).append(gpu_ms)
+
+        oldest = self._in_flight[0][0] if self._in_flight else self.frame + 1
+        for frame in sorted(frame for frame in self._frames if frame < oldest):
+            passes = self._frames.pop(frame)
+            if self._log is not None:
+                self._log.write(json.dumps({'frame': frame, 'passes': passes}) + '\n')
+
+        self.frame += 1
+
+    def stats(self) -> dict:
+        # rolling mean, p95 and max over the last window frames, per pass, in milliseconds
+        return {
+            name: {'cpu_ms': rolling_stats(self.cpu_ms[name]), 'gpu_ms': rolling_stats(self.gpu_ms.get(name, ()))}
+            for name in self.cpu_ms
+        }
+
+    def close(self):
+        for queries, _ in self._rings.values():
+            glDeleteQueries(len(queries), queries)
+        self._rings.clear()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
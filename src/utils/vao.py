@@ -1,40 +1,204 @@
 from OpenGL.GL import *
+import ctypes
 import numpy as np
 
+from utils.files import PLY_ATTRIBUTES
 
-def create_vao(points: list) -> int:
-    points = np.array(points, dtype=np.float32)
 
-    vao = glGenVertexArrays(1)
-    glBindVertexArray(vao)
+# corners of the quad every instanced splat is expanded from, in triangle strip order
+QUAD_CORNERS = np.array([[-1.0, -1.0], [1.0, -1.0], [-1.0, 1.0], [1.0, 1.0]], dtype=np.float32)
+
+
+# attribute location of every field of an interleaved vertex array, location 2 holds QUAD_CORNERS
+VERTEX_ATTRIBUTES = {'position': 0, 'size': 1, 'color': 3, 'normal': 4}
+
+# read_ply records spell the same attributes as groups of scalar fields
+PLY_VERTEX_ATTRIBUTES = {'positions': 'position', 'colors': 'color', 'normals': 'normal'}
+
+GL_TYPES = {
+    np.dtype(np.float32): GL_FLOAT,
+    np.dtype(np.float16): GL_HALF_FLOAT,
+    np.dtype(np.int8): GL_BYTE,
+    np.dtype(np.uint8): GL_UNSIGNED_BYTE,
+    np.dtype(np.int16): GL_SHORT,
+    np.dtype(np.uint16): GL_UNSIGNED_SHORT,
+    np.dtype(np.int32): GL_INT,
+    np.dtype(np.uint32): GL_UNSIGNED_INT,
+}
+
+
+def make_vertices(positions: np.ndarray, sizes: np.ndarray = None, colors: np.ndarray = None,
+                  normals: np.ndarray = None) -> np.ndarray:
+    # packs the given attributes into one structured array, uint8 colors stay normalized bytes and
+    # floating point ones of any precision become float32
+    positions = np.asarray(positions).reshape(-1, 3)
+    fields = [('position', np.float32, (3,))]
+    if sizes is not None:
+        fields.append(('size', np.float32))
+    if colors is not None:
+        colors = np.asarray(colors)
+        if colors.dtype.kind == 'f':
+            colors = colors.astype(np.float32)
+        fields.append(('color', colors.dtype, (colors.shape[-1],)))
+    if normals is not None:
+        fields.append(('normal', np.float32, (3,)))
+
+    vertices = np.empty(len(positions), dtype=fields)
+    vertices['position'] = positions
+    if sizes is not None:
+        vertices['size'] = np.asarray(sizes).reshape(-1)
+    if colors is not None:
+        vertices['color'] = colors
+    if normals is not None:
+        vertices['normal'] = np.asarray(normals).reshape(-1, 3)
+
+    return vertices
+
+
+def _interleaved_layout(dtype: np.dtype) -> list:
+    # (location, components, type, offset) of every attribute found in the record dtype
+    layout = []
+    for name, (field_dtype, offset) in ((name, dtype.fields[name][:2]) for name in dtype.names):
+        if name in VERTEX_ATTRIBUTES:
+            components = int(np.prod(field_dtype.shape)) if field_dtype.shape else 1
+            layout.append((VERTEX_ATTRIBUTES[name], components, field_dtype.base, offset))
+
+    for group, name in PLY_VERTEX_ATTRIBUTES.items():
+        fields = PLY_ATTRIBUTES[group]
+        if name in dtype.names or not all(field in dtype.names for field in fields):
+            continue
+        # grouped scalar fields only form one attribute when they are stored next to each other
+        field_dtype, offset = dtype.fields[fields[0]][:2]
+        if all(dtype.fields[field][:2] == (field_dtype, offset + i * field_dtype.itemsize) for i, field in enumerate(fields)):
+            layout.append((VERTEX_ATTRIBUTES[name], len(fields), field_dtype, offset))
+
+    for location, _, field_dtype, _ in layout:
+        if field_dtype not in GL_TYPES:
+            raise ValueError(f'Vertex attribute {location} has unsupported type {field_dtype}')
+    return layout
+
+
+def _upload_interleaved(vertices: np.ndarray) -> int:
+    # one buffer for every attribute, strides and offsets come from the record dtype
+    if any(not vertices.dtype.fields[name][0].base.isnative for name in vertices.dtype.names):
+        vertices = vertices.astype(vertices.dtype.newbyteorder('='))
+    layout = _interleaved_layout(vertices.dtype)
+    if vertices.dtype.itemsize % 4 or any(offset % field_dtype.itemsize for _, _, field_dtype, offset in layout):
+        # packed records (a 31 byte PLY vertex with 8 bit colors) leave attributes off the 4 byte
+        # alignment GL expects, they are padded like a C struct before the upload
+        aligned = np.dtype([(name, vertices.dtype.fields[name][0]) for name in vertices.dtype.names], align=True)
+        vertices = vertices.astype(aligned)
+        layout = _interleaved_layout(vertices.dtype)
+    if not any(location == VERTEX_ATTRIBUTES['position'] for location, *_ in layout):
+        raise ValueError('Interleaved vertices need a position field')
+    vertices = np.ascontiguousarray(vertices)
 
     vbo = glGenBuffers(1)
     glBindBuffer(GL_ARRAY_BUFFER, vbo)
-    glBufferData(GL_ARRAY_BUFFER, points.nbytes, points, GL_STATIC_DRAW)
+    glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
 
-    glEnableVertexAttribArray(0)
-    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+    for location, components, field_dtype, offset in layout:
+        # integer attributes (8 bit colors) reach the shader normalized to [0, 1]
+        normalized = GL_TRUE if field_dtype.kind in 'iu' else GL_FALSE
+        glEnableVertexAttribArray(location)
+        glVertexAttribPointer(
+            location, components, GL_TYPES[field_dtype], normalized, vertices.dtype.itemsize, ctypes.c_void_p(offset)
+        )
+
+    return vbo
+
+
+def _upload_attribute(location: int, array: np.ndarray, components: int) -> int:
+    # contiguous float32 arrays (read_obj, memory-mapped cache entries) are uploaded without a copy;
+    # strided views such as read_ply attributes are packed first, uploading their whole records
+    # would also send every unused field
+    data = np.ascontiguousarray(array, dtype=np.float32)
+
+    vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+    glEnableVertexAttribArray(location)
+    glVertexAttribPointer(location, components, GL_FLOAT, GL_FALSE, 0, None)
+
+    return vbo
+
+
+def create_vao(points: np.ndarray) -> int:
+    # points are either plain (N, 3) positions or a structured array (make_vertices, read_ply records)
+    vao = glGenVertexArrays(1)
+    glBindVertexArray(vao)
+
+    if np.asarray(points).dtype.names:
+        _upload_interleaved(points)
+    else:
+        _upload_attribute(0, points, 3)
+
+    return vao
+
+
+def create_vao_sized(points: np.ndarray, sizes: np.ndarray) -> int:
+    # float32 inputs (read_obj, memory-mapped cache entries) go up as two buffers without a copy,
+    # interleaving them would copy every point first; anything else is packed into one buffer
+    if np.asarray(points).dtype != np.float32 or np.asarray(sizes).dtype != np.float32:
+        return create_vao(make_vertices(points, sizes))
+
+    vao = glGenVertexArrays(1)
+    glBindVertexArray(vao)
+
+    _upload_attribute(0, points, 3)
+    _upload_attribute(1, sizes, 1)
+
+    return vao
+
+
+def create_vao_instanced(points: np.ndarray, sizes: np.ndarray = None, colors: np.ndarray = None) -> int:
+    # one interleaved record per instance, drawn over the shared quad; points may already be records
+    vertices = points if np.asarray(points).dtype.names else make_vertices(points, sizes, colors)
+    vao = create_vao(vertices)
+    for location, *_ in _interleaved_layout(vertices.dtype):
+        glVertexAttribDivisor(location, 1)
+
+    _upload_attribute(2, QUAD_CORNERS, 2)
 
     return vao
 
 
-def create_vao_sized(points, sizes):
-    points = np.array(points, dtype=np.float32)
-    sizes = np.array(sizes, dtype=np.float32)
+def draw_instanced(instance_count: int):
+    glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, 4, instance_count)
+
 
+def create_vao_streamed(capacity: int) -> tuple:
     vao = glGenVertexArrays(1)
     glBindVertexArray(vao)
 
-    vbo1 = glGenBuffers(1)
-    glBindBuffer(GL_ARRAY_BUFFER, vbo1)
-    glBufferData(GL_ARRAY_BUFFER, points.nbytes, points, GL_STATIC_DRAW)
+    # allocate the whole buffer once, the blocks are filled in later by upload_blocks
+    vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, capacity * 3 * 4, None, GL_STATIC_DRAW)
+
     glEnableVertexAttribArray(0)
     glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
 
-    vbo2 = glGenBuffers(1)
-    glBindBuffer(GL_ARRAY_BUFFER, vbo2)
-    glBufferData(GL_ARRAY_BUFFER, sizes.nbytes, sizes, GL_STATIC_DRAW)
-    glEnableVertexAttribArray(1)
-    glVertexAttribPointer(1, 1, GL_FLOAT, GL_FALSE, 0, None)
+    return vao, vbo
 
-    return vao
+
+def upload_blocks(vbo: int, blocks, capacity: int):
+    # generator uploading one block per step and yielding the number of points ready to draw
+    uploaded = 0
+    for block in blocks:
+        block = np.ascontiguousarray(block[:capacity - uploaded], dtype=np.float32)
+
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, uploaded * 3 * 4, block.nbytes, block)
+
+        uploaded += len(block)
+        yield uploaded
+
+
+def multi_draw_arrays(firsts: np.ndarray, counts: np.ndarray, mode=GL_POINTS):
+    # draws every (first, count) range of the bound vao with a single call
+    if len(firsts) == 0:
+        return
+    firsts = np.ascontiguousarray(firsts, dtype=np.int32)
+    counts = np.ascontiguousarray(counts, dtype=np.int32)
+    glMultiDrawArrays(mode, firsts, counts, len(firsts))
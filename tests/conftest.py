@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+
+# GL tests render offscreen; PyOpenGL picks its platform on the first import of OpenGL
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+from benchmarks import ROOT  # noqa: E402, puts src and final on the path
+
+ASSETS = os.path.join(ROOT, 'assets')
+
+
+@pytest.fixture(scope='session')
+def context():
+    # one 128x128 EGL context shared by every test that needs GL
+    pytest.importorskip('OpenGL')
+    from utils.offscreen import OffscreenContext
+
+    try:
+        context = OffscreenContext('egl', 128, 128)
+    except Exception as error:  # no EGL driver or no desktop GL 4.1 support on this machine
+        pytest.skip(f'no offscreen OpenGL context: {error}')
+    yield context
+    context.destroy()
@@ -0,0 +1,46 @@
+import logging
+
+import numpy as np
+
+
+def arrays(count, size=1000):
+    return [np.full(size, i, dtype=np.float32) for i in range(count)]
+
+
+def test_evict_drops_only_released_buffers(context):
+    from utils.buffers import BufferRegistry
+
+    first, second, third = arrays(3)
+    registry = BufferRegistry(max_bytes=2 * first.nbytes)
+    buffers = [registry.acquire(array) for array in (first, second)]
+    for buffer in buffers:
+        registry.use(buffer)
+    registry.release(buffers[0])
+    assert buffers[0].vbo is not None  # released buffers stay resident while they fit
+
+    registry.use(registry.acquire(third))
+    assert buffers[0].vbo is None
+    assert buffers[1].vbo is not None
+    assert registry.resident_bytes == 2 * first.nbytes
+    registry.clear()
+
+
+def test_buffers_in_use_overrun_the_budget(context, caplog):
+    from utils.buffers import BufferRegistry
+
+    values = arrays(3)
+    registry = BufferRegistry(max_bytes=2 * values[0].nbytes)
+    buffers = [registry.acquire(array) for array in values]
+    with caplog.at_level(logging.WARNING, logger='utils.buffers'):
+        generations = [registry.use(buffer) for buffer in buffers]
+        # a buffer still in use keeps its vbo, its vao never has to be pointed at a new one
+        assert [registry.use(buffer) for buffer in buffers] == generations
+
+    assert all(buffer.vbo is not None for buffer in buffers)
+    assert registry.resident_bytes == 3 * values[0].nbytes
+    assert registry.uploads == 3
+    assert len([record for record in caplog.records if 'over the budget' in record.message]) == 1
+
+    registry.release(buffers[0])
+    assert buffers[0].vbo is None and not registry.over_budget
+    registry.clear()
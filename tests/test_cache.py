@@ -0,0 +1,18 @@
+import os
+
+import numpy as np
+
+from conftest import ASSETS
+from utils.cache import PointCloudCache, read_obj_cached
+from utils.files import read_obj
+
+
+def test_read_obj_cached_maps_the_second_read(tmp_path):
+    filename = os.path.join(ASSETS, 'dense-figure.obj')
+    cache = PointCloudCache(str(tmp_path / 'cache'))
+    first = read_obj_cached(filename, cache)
+    second = read_obj_cached(filename, PointCloudCache(str(tmp_path / 'cache')))
+
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, read_obj(filename))
+    np.testing.assert_array_equal(second, first)
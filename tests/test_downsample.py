@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from utils.downsample import count_voxels, voxel_downsample, voxel_size_for_count
+
+
+def sphere(count, seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(count, 3))
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    return (points + rng.normal(scale=0.01, size=(count, 3))).astype(np.float32)
+
+
+@pytest.mark.parametrize('target_count', [500, 20_000, 150_000])
+def test_voxel_size_for_count_reaches_target(target_count):
+    # the search runs on estimated counts, the exact count may miss the tolerance slightly
+    points = sphere(200_000)
+    count = count_voxels(points, voxel_size_for_count(points, target_count))
+    assert abs(count - target_count) / target_count < 0.05
+
+
+def test_voxel_downsample_target_count():
+    points = sphere(100_000)
+    downsampled, _ = voxel_downsample(points, target_count=10_000)
+    assert downsampled.dtype == np.float32
+    assert abs(len(downsampled) - 10_000) / 10_000 < 0.05
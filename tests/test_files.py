@@ -0,0 +1,160 @@
+import glob
+import os
+import time
+
+import numpy as np
+import pytest
+
+from conftest import ASSETS
+from utils.files import READ_OBJ_TARGET_MB_PER_S, read_obj, read_obj_attributes, read_xyz
+
+
+def read_obj_reference(filename):
+    # the line by line parser read_obj replaced, blank lines aside
+    vertices = []
+    with open(filename, 'r') as file:
+        for line in file:
+            parts = line.split()
+            if parts and parts[0] == 'v':
+                vertices.append(list(map(float, parts[1:4])))
+    return np.array(vertices, dtype=np.float32).reshape(-1, 3)
+
+
+def write(path, data: bytes):
+    with open(path, 'wb') as file:
+        file.write(data)
+    return str(path)
+
+
+@pytest.mark.parametrize('filename', sorted(glob.glob(os.path.join(ASSETS, '*.obj'))), ids=os.path.basename)
+def test_read_obj_matches_reference_on_assets(filename):
+    vertices = read_obj(filename)
+    assert vertices.dtype == np.float32 and vertices.flags.c_contiguous
+    np.testing.assert_array_equal(vertices, read_obj_reference(filename))
+
+
+def test_read_obj_crlf(tmp_path):
+    text = b'# comment\r\nv 1 2 3\r\nvn 0 0 1\r\nv 4.5 -5 6e-1\r\nf 1 2 3\r\n'
+    filename = write(tmp_path / 'crlf.obj', text)
+    np.testing.assert_array_equal(read_obj(filename), np.float32([[1, 2, 3], [4.5, -5, 0.6]]))
+    np.testing.assert_array_equal(read_obj(filename), read_obj_reference(filename))
+
+
+def test_read_obj_without_final_newline(tmp_path):
+    filename = write(tmp_path / 'open.obj', b'v 1 2 3\nv 4 5 6')
+    np.testing.assert_array_equal(read_obj(filename), [[1, 2, 3], [4, 5, 6]])
+
+
+def test_read_obj_empty_file(tmp_path):
+    vertices = read_obj(write(tmp_path / 'empty.obj', b''))
+    assert vertices.shape == (0, 3) and vertices.dtype == np.float32
+
+
+def test_read_obj_indented_records(tmp_path):
+    text = b'o figure\n  v 1 2 3\n\tv\t4 5 6\n \t v 7 8 9\n   \n  vn 0 1 0\nvt 0 0\n'
+    filename = write(tmp_path / 'indented.obj', text)
+    np.testing.assert_array_equal(read_obj(filename), [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+    np.testing.assert_array_equal(read_obj(filename), read_obj_reference(filename))
+
+
+def test_read_obj_inconsistent_records(tmp_path):
+    with pytest.raises(ValueError):
+        read_obj(write(tmp_path / 'broken.obj', b'v 1 2 3\nv 4 5\n'))
+
+
+def test_read_obj_attributes(tmp_path):
+    text = b'v 1 2 3 0.5 0.25 1\nvn 0 0 1\nvt 0 0\n  v 4 5 6 1 0 0\nvn 0 1 0\nf 1 2\n'
+    attributes = read_obj_attributes(write(tmp_path / 'colored.obj', text))
+    assert sorted(attributes) == ['colors', 'normals', 'positions']
+    np.testing.assert_array_equal(attributes['positions'], [[1, 2, 3], [4, 5, 6]])
+    np.testing.assert_array_equal(attributes['normals'], [[0, 0, 1], [0, 1, 0]])
+    np.testing.assert_array_equal(attributes['colors'], [[0.5, 0.25, 1], [1, 0, 0]])
+    assert all(value.dtype == np.float32 and value.flags.c_contiguous for value in attributes.values())
+
+
+def test_read_obj_attributes_skips_partial_normals(tmp_path):
+    # normals only count when every vertex has one, plain vertices carry no colors
+    attributes = read_obj_attributes(write(tmp_path / 'partial.obj', b'v 1 2 3\nv 4 5 6\nvn 0 0 1\n'))
+    assert sorted(attributes) == ['positions']
+    np.testing.assert_array_equal(attributes['positions'], read_obj(str(tmp_path / 'partial.obj')))
+
+
+def test_read_xyz(tmp_path):
+    text = b'# x y z intensity\n1 2 3 0.5\n4.5 -5 6e-1 0.25\n'
+    vertices = read_xyz(write(tmp_path / 'cloud.xyz', text))
+    assert vertices.dtype == np.float32 and vertices.flags.c_contiguous
+    np.testing.assert_array_equal(vertices, np.float32([[1, 2, 3], [4.5, -5, 0.6]]))
+
+
+def test_read_xyz_single_record(tmp_path):
+    np.testing.assert_array_equal(read_xyz(write(tmp_path / 'one.xyz', b'1 2 3')), [[1, 2, 3]])
+
+
+def test_read_obj_throughput_target(tmp_path):
+    # vertex-only files are the slowest case, the best of three runs has to reach the target
+    points = np.random.default_rng(0).normal(size=(300_000, 3))
+    filename = str(tmp_path / 'vertices.obj')
+    np.savetxt(filename, points, fmt='v %.6f %.6f %.6f')
+
+    size_mb = os.path.getsize(filename) / 1024 ** 2
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        read_obj(filename)
+        best = min(best, time.perf_counter() - start)
+    assert size_mb / best >= READ_OBJ_TARGET_MB_PER_S
+
+
+def test_count_vertices_matches_read_obj(tmp_path):
+    from utils.files import count_vertices
+
+    text = b'o figure\n  v 1 2 3\n\tv\t4 5 6\nvn 0 1 0\nv 7 8 9'
+    filename = write(tmp_path / 'count.obj', text)
+    assert count_vertices(filename) == len(read_obj(filename)) == 3
+
+
+def write_mixed_obj(path, count=60_000, seed=0):
+    # v, vn, f and tab-separated records in one file, a couple of megabytes large
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(count, 3)).astype(np.float32)
+    lines = []
+    for i, (x, y, z) in enumerate(points):
+        separator = '\t' if i % 7 == 0 else ' '
+        lines.append(f'v{separator}{x:.6f}{separator}{y:.6f}{separator}{z:.6f}')
+        if i % 3 == 0:
+            lines.append(f'vn {z:.4f} {x:.4f} {y:.4f}')
+        if i % 5 == 0:
+            lines.append(f'f {i + 1} {i + 1} {i + 1}')
+    return write(path, ('\n'.join(lines) + '\n').encode())
+
+
+def test_read_obj_parallel_matches_serial(tmp_path, monkeypatch):
+    from utils import files
+
+    filename = write_mixed_obj(tmp_path / 'mixed.obj')
+    monkeypatch.setattr(files, 'PARALLEL_RANGE_BYTES', 300_000)
+    assert len(files._split_ranges(filename, 4)) == 4
+
+    parallel = files.read_obj_parallel(filename, workers=4)
+    serial = read_obj(filename)
+    assert parallel.dtype == serial.dtype and parallel.flags.c_contiguous
+    np.testing.assert_array_equal(parallel, serial)
+
+
+@pytest.mark.parametrize('side', ['before', 'after'])
+def test_read_obj_parallel_malformed_record_at_range_boundary(tmp_path, monkeypatch, side):
+    from utils import files
+
+    filename = write_mixed_obj(tmp_path / 'mixed.obj')
+    monkeypatch.setattr(files, 'PARALLEL_RANGE_BYTES', 300_000)
+    parts = max(4, -(-os.path.getsize(filename) // files.PARALLEL_RANGE_BYTES))
+    boundary = files._split_ranges(filename, parts)[1][0]
+
+    # the broken record ends the range before a boundary or starts the one after it
+    with open(filename, 'rb') as file:
+        data = file.read()
+    cut = data.rfind(b'\n', 0, boundary - 1) + 1 if side == 'before' else boundary
+    write(filename, data[:cut] + b'v 1.0 2.0\n' + data[cut:])
+
+    with pytest.raises(ValueError):
+        files.read_obj_parallel(filename, workers=4)
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ASSETS
+
+pytest.importorskip('OpenGL')
+
+VARIANTS = ['circle', 'point_sprite', 'instanced_quad', 'dynamic_point_sprite']
+CLEAR_COLOR = np.array([0.3, 0.3, 0.3]) * 255
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_offscreen_render_is_not_empty(context, variant):
+    from OpenGL.GL import (
+        GL_BLEND, GL_ONE_MINUS_SRC_ALPHA, GL_PROGRAM_POINT_SIZE, GL_RENDERER, GL_SRC_ALPHA, glBlendFunc, glEnable,
+        glGetString
+    )
+    from headless import is_software_renderer, render_frames
+    from utils.cloud import load_cloud
+    from utils.shaders import create_frame_uniforms, create_splat_shader, is_dynamic, is_instanced
+    from utils.vao import create_vao, create_vao_instanced, create_vao_sized
+
+    vertices, sizes = load_cloud(os.path.join(ASSETS, 'dense-figure.obj'), is_dynamic(variant), use_cache=False)
+    if is_instanced(variant):
+        vao = create_vao_instanced(vertices, sizes)
+    else:
+        vao = create_vao_sized(vertices, sizes) if sizes is not None else create_vao(vertices)
+
+    frame = create_frame_uniforms(context.height)
+    glEnable(GL_PROGRAM_POINT_SIZE)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    context.bind()
+    gpu_timer = not is_software_renderer(glGetString(GL_RENDERER).decode())
+    timings = render_frames(create_splat_shader(variant), vao, len(vertices), 3, is_instanced(variant), gpu_timer=gpu_timer)
+    pixels = context.read_pixels()
+
+    # every part of a frame happens between its start and glFinish returning
+    assert len(timings) == 3
+    for timing in timings:
+        assert 0 < timing['cpu_ms'] <= timing['frame_ms']
+        assert ('gpu_ms' in timing) == gpu_timer
+        if gpu_timer:
+            assert 0 < timing['gpu_ms'] <= timing['frame_ms']
+    covered = np.any(np.abs(pixels[..., :3].astype(np.float64) - CLEAR_COLOR) > 2, axis=-1)
+    assert covered.sum() > 100
+    frame.delete()
+
+
+def test_instance_colors(context, tmp_path):
+    from OpenGL.GL import GL_BLEND, glDisable
+    from headless import render_frames
+    from utils.cloud import load_colors
+    from utils.files import read_obj
+    from utils.shaders import create_frame_uniforms, create_splat_shader, set_instance_colors
+    from utils.vao import create_vao_instanced
+
+    # float64 red colors in the file, the splat color is cyan, only per-instance colors make red pixels
+    vertices = read_obj(os.path.join(ASSETS, 'dense-figure.obj'))
+    filename = str(tmp_path / 'red.obj')
+    np.savetxt(filename, np.hstack([vertices, np.tile([1.0, 0.0, 0.0], (len(vertices), 1))]), fmt='v %.6f %.6f %.6f %g %g %g')
+    colors = load_colors(filename).astype(np.float64)
+
+    vao = create_vao_instanced(vertices, colors=colors)
+    frame = create_frame_uniforms(context.height)
+    frame.update(transparency=1.0)
+    glDisable(GL_BLEND)
+    shader = create_splat_shader('instanced_quad')
+    context.bind()
+    red = []
+    for enabled in (False, True):
+        set_instance_colors(shader, enabled)
+        render_frames(shader, vao, len(vertices), 1, instanced=True, gpu_timer=False)
+        pixels = context.read_pixels()[..., :3].astype(np.int64)
+        red.append(np.sum((pixels[..., 0] > 200) & (pixels[..., 1] < 50) & (pixels[..., 2] < 50)))
+
+    assert red[0] == 0 and red[1] > 100
+    frame.delete()
+
+
+@pytest.mark.parametrize('variant', ['circle', 'dynamic_point_sprite', 'dynamic_instanced_quad'])
+def test_quantized_render_matches_float(context, variant):
+    # the vertex prelude decodes the records of quantize_vertices back to nearly the same image
+    from headless import render_frames
+    from utils.cloud import load_cloud
+    from utils.quantize import quantize_vertices
+    from utils.shaders import create_frame_uniforms, create_splat_shader, is_dynamic, is_instanced, set_quantization_uniforms
+    from utils.vao import create_vao, create_vao_instanced, create_vao_sized
+
+    vertices, sizes = load_cloud(os.path.join(ASSETS, 'dense-figure.obj'), is_dynamic(variant), use_cache=False)
+    records, encoding = quantize_vertices(vertices, sizes, size_encoding='log8')
+    if is_instanced(variant):
+        vaos = [create_vao_instanced(vertices, sizes), create_vao_instanced(records)]
+    else:
+        vaos = [create_vao_sized(vertices, sizes) if sizes is not None else create_vao(vertices), create_vao(records)]
+
+    frame = create_frame_uniforms(context.height)
+    shader = create_splat_shader(variant)
+    context.bind()
+    images = []
+    for vao, vao_encoding in zip(vaos, [None, encoding]):
+        set_quantization_uniforms(shader, vao_encoding)
+        render_frames(shader, vao, len(vertices), 1, is_instanced(variant), gpu_timer=False)
+        images.append(context.read_pixels()[..., :3].astype(np.int64))
+
+    covered = np.any(np.abs(images[0] - CLEAR_COLOR) > 2, axis=-1)
+    changed = np.any(np.abs(images[0] - images[1]) > 8, axis=-1)
+    assert covered.sum() > 100 and changed.sum() < 0.05 * covered.sum()
+    frame.delete()
+
+
+@pytest.mark.parametrize('variant', ['circle', 'point_sprite', 'instanced_quad'])
+def test_weighted_blended_render(context, variant):
+    # every fragment shader takes oitWeight from the fragment prelude
+    from OpenGL.GL import GL_NO_ERROR, glGetError
+    from headless import render_frames
+    from utils.files import read_obj
+    from utils.oit import WeightedBlendedOIT
+    from utils.shaders import create_frame_uniforms, create_splat_shader, is_instanced
+    from utils.vao import create_vao, create_vao_instanced
+
+    vertices = read_obj(os.path.join(ASSETS, 'dense-figure.obj'))
+    vao = create_vao_instanced(vertices) if is_instanced(variant) else create_vao(vertices)
+    frame = create_frame_uniforms(context.height)
+    frame.update(weightedBlended=True)
+    oit = WeightedBlendedOIT(context.width, context.height)
+
+    context.bind()
+    render_frames(create_splat_shader(variant), vao, len(vertices), 1, is_instanced(variant), oit, context.framebuffer, False)
+    pixels = context.read_pixels()
+
+    assert glGetError() == GL_NO_ERROR
+    covered = np.any(np.abs(pixels[..., :3].astype(np.float64) - CLEAR_COLOR) > 2, axis=-1)
+    assert covered.sum() > 100
+    frame.delete()
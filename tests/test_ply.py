@@ -0,0 +1,78 @@
+import numpy as np
+
+from utils.files import read_ply, read_xyz_binary, write_ply
+
+
+def cloud(count=100, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = rng.normal(size=(count, 3)).astype(np.float32)
+    normals = rng.normal(size=(count, 3)).astype(np.float32)
+    colors = rng.integers(0, 256, size=(count, 3), dtype=np.uint8)
+    intensity = rng.random(count).astype(np.float32)
+    return positions, normals, colors, intensity
+
+
+def test_ply_round_trip(tmp_path):
+    positions, normals, colors, intensity = cloud()
+    filename = str(tmp_path / 'cloud.ply')
+    write_ply(filename, positions, normals, colors, intensity)
+    attributes = read_ply(filename)
+
+    vertices = attributes['vertices']
+    # x y z, nx ny nz as float32, red green blue as uint8 and the intensity, packed without padding
+    assert vertices.dtype.itemsize == 31
+    assert vertices.dtype.names == ('x', 'y', 'z', 'nx', 'ny', 'nz', 'red', 'green', 'blue', 'intensity')
+    assert attributes['positions'].dtype == np.float32 and attributes['colors'].dtype == np.uint8
+
+    np.testing.assert_array_equal(attributes['positions'], positions)
+    np.testing.assert_array_equal(attributes['normals'], normals)
+    np.testing.assert_array_equal(attributes['colors'], colors)
+    np.testing.assert_array_equal(vertices['intensity'], intensity)
+
+
+def test_ply_attributes_are_views(tmp_path):
+    positions, normals, colors, _ = cloud()
+    filename = str(tmp_path / 'cloud.ply')
+    write_ply(filename, positions, normals, colors)
+    attributes = read_ply(filename)
+
+    for name in ('positions', 'normals', 'colors'):
+        view = attributes[name]
+        assert np.shares_memory(view, attributes['vertices'])
+        assert view.strides[0] == attributes['vertices'].dtype.itemsize
+
+
+def test_ply_float_colors_are_scaled(tmp_path):
+    positions, _, colors, _ = cloud()
+    filename = str(tmp_path / 'cloud.ply')
+    write_ply(filename, positions, colors=colors / 255.0)
+    np.testing.assert_array_equal(read_ply(filename)['colors'], colors)
+
+
+def test_read_xyz_binary(tmp_path):
+    positions = cloud()[0]
+    filename = str(tmp_path / 'cloud.bin')
+    positions.astype('<f4').tofile(filename)
+    np.testing.assert_array_equal(read_xyz_binary(filename), positions)
+
+
+def test_create_vao_uploads_aligned_ply_records(context, tmp_path):
+    from OpenGL.GL import GL_ARRAY_BUFFER, GL_VERTEX_ATTRIB_ARRAY_STRIDE, glGetBufferSubData, glGetVertexAttribiv
+    from utils.vao import VERTEX_ATTRIBUTES, create_vao
+
+    positions, normals, colors, intensity = cloud()
+    filename = str(tmp_path / 'cloud.ply')
+    write_ply(filename, positions, normals, colors, intensity)
+    vertices = read_ply(filename)['vertices']
+
+    create_vao(vertices)
+    # the 31 byte records are padded like a C struct, every attribute reads its own values back
+    aligned = np.dtype([(name, vertices.dtype.fields[name][0]) for name in vertices.dtype.names], align=True)
+    assert aligned.itemsize == 32
+    for name in ('position', 'normal', 'color'):
+        assert glGetVertexAttribiv(VERTEX_ATTRIBUTES[name], GL_VERTEX_ATTRIB_ARRAY_STRIDE)[0] == aligned.itemsize
+
+    # create_vao leaves the vbo bound
+    uploaded = np.frombuffer(glGetBufferSubData(GL_ARRAY_BUFFER, 0, len(vertices) * aligned.itemsize), dtype=aligned)
+    for name in vertices.dtype.names:
+        np.testing.assert_array_equal(uploaded[name], vertices[name])
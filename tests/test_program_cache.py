@@ -0,0 +1,56 @@
+import glob
+import os
+
+import pytest
+
+VERTEX = '#version 410\nlayout (location = 0) in vec3 aPos;\nvoid main() { gl_Position = vec4(aPos, 1.0); }\n'
+FRAGMENT = '#version 410\nout vec4 fragColor;\nvoid main() { fragColor = vec4(1.0); }\n'
+
+
+def stages():
+    from OpenGL.GL import GL_FRAGMENT_SHADER, GL_VERTEX_SHADER
+    return [(VERTEX, GL_VERTEX_SHADER), (FRAGMENT, GL_FRAGMENT_SHADER)]
+
+
+def cached_binary(cache):
+    from OpenGL.GL import GL_NUM_PROGRAM_BINARY_FORMATS, glGetIntegerv
+
+    cache.compile(stages())
+    paths = glob.glob(os.path.join(cache.directory, '*.bin'))
+    if glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) == 0 or not paths:
+        pytest.skip('the driver does not return program binaries')
+    return paths[0]
+
+
+def test_program_cache_hit(context, tmp_path):
+    from utils.program_cache import ProgramCache
+
+    cache = ProgramCache(str(tmp_path))
+    cached_binary(cache)
+    cache.compile(stages())
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.parametrize('corruption', ['format', 'binary'])
+def test_program_cache_recompiles_rejected_binaries(context, tmp_path, corruption):
+    from OpenGL.GL import GL_LINK_STATUS, glGetProgramiv
+    from utils.program_cache import ProgramCache
+
+    cache = ProgramCache(str(tmp_path))
+    path = cached_binary(cache)
+    with open(path, 'rb') as file:
+        data = bytearray(file.read())
+    if corruption == 'format':
+        # an unknown binary format makes glProgramBinary raise GL_INVALID_ENUM
+        data[:4] = (0xDEAD).to_bytes(4, 'little')
+    else:
+        # a known format with a payload the driver cannot link
+        data[4:] = bytes(len(data) - 4)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+    program = cache.compile(stages())
+    assert glGetProgramiv(program, GL_LINK_STATUS)
+    assert (cache.hits, cache.misses) == (0, 2)
+    with open(path, 'rb') as file:
+        assert file.read() != bytes(data)  # replaced by a fresh binary
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from utils.cloud import SPLAT_SIZE_RANGE
+from utils.quantize import (
+    decode_sizes_log8, dequantize_positions, encode_sizes_log8, position_error_bound, quantize_positions, size_error_bound
+)
+
+
+def worst_sizes():
+    # a dense sweep of the range plus the float32 neighbours of every midpoint between two log8 steps
+    low, high = np.log(SPLAT_SIZE_RANGE[0]), np.log(SPLAT_SIZE_RANGE[1])
+    sweep = np.exp(np.linspace(low, high, 1_000_001))
+    midpoints = np.exp(low + (np.arange(255) + 0.5) / 255 * (high - low)).astype(np.float32)
+    neighbours = [np.nextafter(midpoints, np.float32(direction)) for direction in (0, np.inf)]
+    return np.concatenate([sweep.astype(np.float32), midpoints] + neighbours)
+
+
+def test_log8_error_within_bound():
+    sizes = worst_sizes()
+    decoded = decode_sizes_log8(encode_sizes_log8(sizes))
+    assert np.max(np.abs(decoded / sizes - 1)) <= size_error_bound('log8')
+
+
+def test_half_error_within_bound():
+    sizes = worst_sizes()
+    decoded = sizes.astype(np.float16).astype(np.float32)
+    assert np.max(np.abs(decoded / sizes - 1)) <= size_error_bound('half')
+
+
+@pytest.mark.parametrize('size_encoding', ['half', 'log8'])
+def test_bound_is_tight(size_encoding):
+    # the float32 term widens the bound by a rounding error, not by a step
+    sizes = worst_sizes()
+    if size_encoding == 'log8':
+        decoded = decode_sizes_log8(encode_sizes_log8(sizes))
+    else:
+        decoded = sizes.astype(np.float16).astype(np.float32)
+    assert size_error_bound(size_encoding) - np.max(np.abs(decoded / sizes - 1)) < 1e-6
+
+
+@pytest.mark.parametrize('extent', [1e-3, 1.0, 1e3])
+def test_position_round_trip_within_bound(extent):
+    rng = np.random.default_rng(2)
+    points = ((rng.normal(size=(100_000, 3)) + [5.0, -3.0, 0.25]) * extent).astype(np.float32)
+    quantized, offset, scale = quantize_positions(points)
+    decoded = dequantize_positions(quantized, offset, scale)
+
+    assert quantized.dtype == np.uint16 and decoded.dtype == np.float32
+    assert np.max(np.abs(decoded - points)) <= position_error_bound(offset, scale)
@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+import pytest
+
+from scene_object import SceneGraph, SceneObject
+
+
+def random_transform(rng):
+    matrix = np.identity(4, dtype=np.float32)
+    matrix[:3, :3] = np.linalg.qr(rng.normal(size=(3, 3)))[0] * rng.uniform(0.5, 2.0)
+    matrix[3, :3] = rng.normal(size=3)
+    return matrix
+
+
+def make_objects(count, prefix, rng):
+    graph = SceneGraph()
+    return [SceneObject(f'{prefix}{i}', None, random_transform(rng), graph=graph) for i in range(count)]
+
+
+def test_add_child_keeps_world():
+    rng = np.random.default_rng(0)
+    objects = make_objects(50, 'keep', rng)
+    worlds = [obj.world.copy() for obj in objects]
+    for i in range(1, len(objects)):
+        objects[rng.integers(0, i)].add_child(objects[i])
+    # moving a subtree under another branch keeps it in place as well
+    objects[-1].add_child(objects[1])
+
+    for obj, world in zip(objects, worlds):
+        np.testing.assert_allclose(obj.world, world, atol=1e-3)
+
+
+def test_add_child_rejects_cycles():
+    objects = make_objects(3, 'cycle', np.random.default_rng(1))
+    objects[0].add_child(objects[1])
+    objects[1].add_child(objects[2])
+    for parent, child in [(objects[2], objects[0]), (objects[1], objects[1])]:
+        with pytest.raises(Exception):
+            parent.add_child(child)
+
+
+def test_building_a_tree_scales():
+    # every add_child walks one parent chain instead of the subtree and the whole graph
+    rng = np.random.default_rng(2)
+    timings = []
+    for count in (1000, 5000):
+        objects = make_objects(count, f'scale{count}_', rng)
+        start = time.perf_counter()
+        for i in range(1, count):
+            objects[(i - 1) // 4].add_child(objects[i])
+        timings.append(time.perf_counter() - start)
+    # five times the nodes, linear growth takes about five times as long, the subtree walk took 25
+    assert timings[1] < 12 * timings[0]
+
+
+def test_world_of_a_clean_graph_skips_the_scan():
+    # reading world matrices after update() checks one flag instead of every node
+    timings = []
+    for count in (1000, 200_000):
+        graph = SceneGraph(count)
+        for _ in range(count):
+            graph.add(np.identity(4, dtype=np.float32))
+        obj = SceneObject(f'clean{count}', None, np.identity(4, dtype=np.float32), graph=graph)
+        obj.world
+        assert not graph.changed
+
+        start = time.perf_counter()
+        for _ in range(2000):
+            obj.world
+        timings.append(time.perf_counter() - start)
+
+    assert timings[1] < 2 * timings[0]
+    obj.local = np.identity(4, dtype=np.float32) * 2
+    assert graph.changed
+    np.testing.assert_array_equal(obj.world, np.identity(4) * 2)
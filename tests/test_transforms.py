@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from transforms import Transforms
+
+
+def test_batches_match_scalar_transforms():
+    angles = np.random.default_rng(0).random((20, 3)) * 2 * np.pi
+    expected = [Transforms.rotate(*row) @ Transforms.translate(*row) @ Transforms.scale(*row) for row in angles]
+    composed = Transforms.compose(
+        Transforms.rotate_batch(angles), Transforms.translate_batch(angles), Transforms.scale_batch(angles)
+    )
+    np.testing.assert_allclose(composed, expected, atol=1e-5)
+
+
+def test_compose_single_matrix_is_a_float32_copy():
+    matrix = Transforms.translate(1.0, 2.0, 3.0)
+    composed = Transforms.compose(matrix)
+    assert composed.dtype == np.float32 and not np.shares_memory(composed, matrix)
+    np.testing.assert_array_equal(composed, matrix)
+
+    out = np.empty((4, 4), dtype=np.float32)
+    assert Transforms.compose(matrix, out=out) is out
+    np.testing.assert_array_equal(out, matrix)
+
+    with pytest.raises(ValueError):
+        Transforms.compose()
+
+
+def test_compose_quaternions_broadcasts_a_single_one():
+    rng = np.random.default_rng(1)
+    quaternions = rng.normal(size=(5, 4))
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+    composed = Transforms.compose_quaternions(quaternions, quaternions[:1])
+    expected = Transforms.compose(Transforms.from_quaternions(quaternions), Transforms.from_quaternions(quaternions[:1]))
+    np.testing.assert_allclose(Transforms.from_quaternions(composed), expected, atol=1e-5)
+
+
+def test_compose_quaternions_rejects_mismatched_counts():
+    with pytest.raises(ValueError):
+        Transforms.compose_quaternions(np.zeros((3, 4)), np.zeros((2, 4)))
+
+
+@pytest.mark.parametrize('axis', range(3))
+def test_from_quaternions_matches_rotate_batch(axis):
+    angles = np.linspace(-np.pi, np.pi, 9)
+    quaternions = np.zeros((len(angles), 4))
+    quaternions[:, axis] = np.sin(angles / 2)
+    quaternions[:, 3] = np.cos(angles / 2)
+    euler = np.zeros((len(angles), 3))
+    euler[:, axis] = angles
+    np.testing.assert_allclose(Transforms.from_quaternions(quaternions), Transforms.rotate_batch(euler), atol=1e-6)
+
+
+def test_compose_quaternions_checks_out():
+    quaternions = np.tile(np.float32([0, 0, 0, 1]), (3, 1))
+    out = np.empty((3, 4), dtype=np.float32)
+    assert Transforms.compose_quaternions(quaternions, quaternions, out=out) is out
+    for wrong in (np.empty((2, 4), dtype=np.float32), np.empty((3, 4))):
+        with pytest.raises(ValueError):
+            Transforms.compose_quaternions(quaternions, quaternions, out=wrong)